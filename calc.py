@@ -1,9 +1,29 @@
-from io import StringIO
 import streamlit as st
 import hashlib
 import datetime
+import functools
+import socket
+import time
 import requests
 import json
+import pandas as pd
+import numpy as np
+from pathlib import Path
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+
+from gpa_engine import (
+    GRADE_SCALES, semester_totals, cumulative_totals, grade_points_array, grouped_gpa,
+    scale_max, plan_semesters, distinct_plans, scenario_sweep,
+    grade_distribution, simulate_final_cgpa, target_probability,
+)
+from storage import BACKENDS, SQLiteStorage, SupabaseStorage
+from services import UsageLogger, UserDataCache
+from transcript_export import (
+    EXPORT_FORMATS, available_formats, calculator_rows, record_rows, export_bytes,
+)
+
+RUN_STARTED = time.perf_counter()
 
 # App config
 st.set_page_config(
@@ -12,242 +32,272 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
+# ==================== STATIC ASSETS ====================
+APP_DIR = Path(__file__).parent
+STATIC_DIR = APP_DIR / "static"
+FONT_WEIGHTS = (300, 400, 600, 700)
+REMOTE_FONTS = "https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;600;700&display=swap"
+REMOTE_BACKGROUND = "https://images.unsplash.com/photo-1523050854058-8df90110c9f1?w={width}"
+
+def static_url(name):
+    """URL of a file in static/ tagged with its content hash; versioned URLs are served with a long Cache-Control"""
+    digest = hashlib.sha256((STATIC_DIR / name).read_bytes()).hexdigest()[:12]
+    return f"app/static/{name}?v={digest}"
+
+@st.cache_resource
+def load_styles():
+    """Build the page CSS string once per process. Uses the self-hosted font and background in static/
+    (see scripts/fetch_assets.py) when present, otherwise the Google Fonts / Unsplash originals.
+    The <style> block itself is still sent with every rerun: Streamlit serves static .css as
+    text/plain with nosniff, which browsers refuse to apply as a stylesheet."""
+    css = (APP_DIR / "assets" / "style.css").read_text(encoding="utf-8")
+    font_files = [f"fonts/poppins-{weight}.woff2" for weight in FONT_WEIGHTS]
+    if all((STATIC_DIR / name).exists() for name in font_files):
+        # The fonts also arrive as text/plain + nosniff, but the Fetch spec only enforces
+        # nosniff for script and style requests, and browsers don't check font MIME types
+        head = ""
+        css = "".join(
+            f"@font-face {{ font-family: 'Poppins'; font-style: normal; font-weight: {weight}; "
+            f"font-display: swap; src: url('{static_url(name)}') format('woff2'); }}\n"
+            for weight, name in zip(FONT_WEIGHTS, font_files)
+        ) + css
+    else:
+        head = f'<link href="{REMOTE_FONTS}" rel="stylesheet">'
+    for placeholder, width in (("{{BACKGROUND_LARGE}}", 1600), ("{{BACKGROUND_SMALL}}", 800)):
+        name = f"background-{width}.webp"
+        url = static_url(name) if (STATIC_DIR / name).exists() else REMOTE_BACKGROUND.format(width=width)
+        css = css.replace(placeholder, url)
+    return f"{head}<style>\n{css}</style>"
+
 # Custom styling with background image and mobile responsiveness
-st.markdown("""
-    <link href="https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;600;700&display=swap" rel="stylesheet">
-    <style>
-        html, body, [class*="css"] {
-            font-family: 'Poppins', sans-serif;
-        }
-        
-        .stApp {
-            background: linear-gradient(rgba(255, 255, 255, 0.92), rgba(255, 255, 255, 0.92)),
-                        url('https://images.unsplash.com/photo-1523050854058-8df90110c9f1?w=1600') center/cover no-repeat fixed;
-        }
-        
-        @media (max-width: 768px) {
-            .stApp {
-                background: linear-gradient(rgba(255, 255, 255, 0.95), rgba(255, 255, 255, 0.95)),
-                            url('https://images.unsplash.com/photo-1523050854058-8df90110c9f1?w=800') center/cover no-repeat fixed;
-            }
-        }
-        
-        .hero-section {
-            text-align: center;
-            padding: 2rem 1rem;
-            background: white;
-            border-radius: 20px;
-            margin-bottom: 2rem;
-            color: #333;
-            box-shadow: 0 4px 20px rgba(0,0,0,0.08);
-            border: 2px solid #f0f0f0;
-        }
-        
-        .hero-title {
-            font-size: 2.5rem;
-            font-weight: 700;
-            margin-bottom: 0.5rem;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            -webkit-background-clip: text;
-            -webkit-text-fill-color: transparent;
-        }
-        
-        .hero-subtitle {
-            font-size: 1.1rem;
-            font-weight: 400;
-            color: #666;
-        }
-        
-        @media (max-width: 768px) {
-            .hero-title { font-size: 1.8rem; }
-            .hero-subtitle { font-size: 0.95rem; }
-            .hero-section { padding: 1.5rem 0.75rem; }
-        }
-        
-        /* ACTION CARDS - The big clickable ones on landing */
-        .action-card {
-            background: white;
-            padding: 2rem 1.5rem;
-            border-radius: 20px;
-            box-shadow: 0 6px 25px rgba(102, 126, 234, 0.15);
-            margin-bottom: 1rem;
-            text-align: center;
-            border: 2px solid #f0f0f0;
-            transition: all 0.3s ease;
-        }
-        
-        .action-card:hover {
-            border-color: #667eea;
-            box-shadow: 0 10px 35px rgba(102, 126, 234, 0.25);
-            transform: translateY(-4px);
-        }
-        
-        .action-card .card-icon {
-            font-size: 3rem;
-            margin-bottom: 0.75rem;
-            display: block;
-        }
-        
-        .action-card .card-title {
-            font-size: 1.4rem;
-            font-weight: 700;
-            color: #333;
-            margin-bottom: 0.4rem;
-        }
-        
-        .action-card .card-desc {
-            font-size: 0.9rem;
-            color: #777;
-            line-height: 1.5;
-            margin-bottom: 1rem;
-        }
-        
-        @media (max-width: 768px) {
-            .action-card { padding: 1.5rem 1rem; }
-            .action-card .card-icon { font-size: 2.5rem; }
-            .action-card .card-title { font-size: 1.2rem; }
-        }
-
-        .feature-card {
-            background: white;
-            padding: 1.5rem;
-            border-radius: 15px;
-            box-shadow: 0 4px 20px rgba(0,0,0,0.08);
-            margin-bottom: 1rem;
-            transition: transform 0.3s ease, box-shadow 0.3s ease;
-            border-left: 4px solid #667eea;
-        }
-        
-        .feature-card:hover {
-            transform: translateY(-5px);
-            box-shadow: 0 8px 30px rgba(0,0,0,0.15);
-        }
-        
-        .feature-icon { font-size: 2.5rem; margin-bottom: 0.5rem; }
-        .feature-title { font-size: 1.3rem; font-weight: 600; color: #333; margin-bottom: 0.5rem; }
-        .feature-desc { font-size: 0.95rem; color: #666; line-height: 1.6; }
-        
-        .stButton > button {
-            border-radius: 10px;
-            font-weight: 600;
-            padding: 0.6rem 2rem;
-            border: none;
-            transition: all 0.3s ease;
-        }
-        
-        .stButton > button:hover {
-            transform: translateY(-2px);
-            box-shadow: 0 5px 15px rgba(0,0,0,0.2);
-        }
-        
-        [data-testid="stMetricValue"] {
-            font-size: 2rem;
-            font-weight: 700;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            -webkit-background-clip: text;
-            -webkit-text-fill-color: transparent;
-        }
-        
-        @media (max-width: 768px) {
-            [data-testid="stMetricValue"] { font-size: 1.5rem; }
-            [data-testid="stMetricLabel"] { font-size: 0.85rem; }
-        }
-        
-        .success-box {
-            padding: 1rem;
-            background: linear-gradient(135deg, #667eea15 0%, #764ba215 100%);
-            border-left: 4px solid #667eea;
-            border-radius: 8px;
-            margin: 1rem 0;
-        }
-        
-        .tutorial-step {
-            background: white;
-            padding: 1.5rem;
-            border-radius: 12px;
-            margin-bottom: 1.5rem;
-            box-shadow: 0 3px 15px rgba(0,0,0,0.1);
-            border-left: 5px solid #667eea;
-        }
-        
-        .step-number {
-            display: inline-block;
-            width: 40px;
-            height: 40px;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            border-radius: 50%;
-            text-align: center;
-            line-height: 40px;
-            font-weight: 700;
-            margin-right: 1rem;
-            font-size: 1.2rem;
-        }
-        
-        @media (max-width: 768px) {
-            .feature-card { padding: 1rem; }
-            .tutorial-step { padding: 1rem; }
-            .step-number { width: 35px; height: 35px; line-height: 35px; font-size: 1rem; }
-        }
-        
-        #MainMenu {visibility: hidden;}
-        footer {visibility: hidden;}
-        
-        .stTabs [data-baseweb="tab-list"] { gap: 10px; }
-        .stTabs [data-baseweb="tab"] { border-radius: 10px 10px 0 0; padding: 10px 20px; font-weight: 600; }
-        
-        .stTextInput > div > div > input,
-        .stNumberInput > div > div > input,
-        .stSelectbox > div > div { border-radius: 8px; }
-    </style>
-""", unsafe_allow_html=True)
+st.markdown(load_styles(), unsafe_allow_html=True)
 
 # ==================== SUPABASE CONFIGURATION ====================
-try:
-    SUPABASE_URL = st.secrets["SUPABASE_URL"]
-    SUPABASE_KEY = st.secrets["SUPABASE_KEY"]
-    SUPABASE_CONFIGURED = True
-except:
+@st.cache_resource
+def load_settings():
+    """Read secrets once per process; None when no storage backend is configured"""
+    try:
+        secrets = st.secrets
+        backend = secrets.get("STORAGE_BACKEND", "supabase")
+    except Exception:
+        return None
+    # Optional tuning, e.g. SUPABASE_POOL_SIZE = 20 in secrets.toml
+    settings = {
+        "backend": backend,
+        "sqlite_path": secrets.get("SQLITE_PATH", "cgpa_calculator.db"),
+        "url": None,
+        "user_cache_ttl": float(secrets.get("USER_CACHE_TTL", 300)),
+        "user_cache_size": int(secrets.get("USER_CACHE_SIZE", 500)),
+    }
+    try:
+        url = secrets["SUPABASE_URL"]
+        key = secrets["SUPABASE_KEY"]
+    except Exception:
+        # SQLite needs no credentials (usage logging just stays off); an unknown
+        # backend is returned too so it gets reported instead of silently ignored
+        return None if backend == "supabase" else settings
+    settings.update({
+        "url": url,
+        "headers": {
+            "apikey": key,
+            "Content-Type": "application/json",
+            "Prefer": "return=representation"
+        },
+        "pool_size": int(secrets.get("SUPABASE_POOL_SIZE", 10)),
+        "keepalive_idle": int(secrets.get("SUPABASE_KEEPALIVE_IDLE", 60)),
+        "timeouts": {
+            "GET": float(secrets.get("SUPABASE_GET_TIMEOUT", 10)),
+            "POST": float(secrets.get("SUPABASE_POST_TIMEOUT", 15)),
+            "PATCH": float(secrets.get("SUPABASE_PATCH_TIMEOUT", 15)),
+            "DELETE": float(secrets.get("SUPABASE_DELETE_TIMEOUT", 10)),
+        },
+        "usage_log_batch": int(secrets.get("USAGE_LOG_BATCH", 50)),
+        "usage_log_interval": float(secrets.get("USAGE_LOG_INTERVAL", 5)),
+        "usage_log_queue": int(secrets.get("USAGE_LOG_QUEUE", 1000)),
+    })
+    return settings
+
+SETTINGS = load_settings()
+STORAGE_CONFIGURED = SETTINGS is not None
+SUPABASE_CONFIGURED = STORAGE_CONFIGURED and SETTINGS["url"] is not None
+if STORAGE_CONFIGURED and SETTINGS["backend"] not in BACKENDS:
+    st.error(f"❌ Unknown STORAGE_BACKEND \"{SETTINGS['backend']}\" in secrets (use {' or '.join(BACKENDS)}). Data won't be saved.")
+    STORAGE_CONFIGURED = False
+elif not STORAGE_CONFIGURED:
     st.warning("⚠️ Database not configured. You can still use the calculator, but data won't be saved.")
-    SUPABASE_CONFIGURED = False
-
+else:
+    STORAGE_BACKEND = SETTINGS["backend"]
+    SQLITE_PATH = SETTINGS["sqlite_path"]
+    USER_CACHE_TTL = SETTINGS["user_cache_ttl"]
+    USER_CACHE_SIZE = SETTINGS["user_cache_size"]
 if SUPABASE_CONFIGURED:
-    HEADERS = {
-        "apikey": SUPABASE_KEY,
-        "Content-Type": "application/json",
-        "Prefer": "return=representation"
-    }
+    SUPABASE_URL = SETTINGS["url"]
+    HEADERS = SETTINGS["headers"]
+    SUPABASE_POOL_SIZE = SETTINGS["pool_size"]
+    SUPABASE_KEEPALIVE_IDLE = SETTINGS["keepalive_idle"]
+    SUPABASE_TIMEOUTS = SETTINGS["timeouts"]
+    USAGE_LOG_BATCH = SETTINGS["usage_log_batch"]
+    USAGE_LOG_INTERVAL = SETTINGS["usage_log_interval"]
+    USAGE_LOG_QUEUE = SETTINGS["usage_log_queue"]
+
+# ==================== HTTP CONNECTION POOL ====================
+class KeepAliveAdapter(HTTPAdapter):
+    """HTTPAdapter whose pooled sockets use TCP keep-alive so idle connections survive between reruns"""
+
+    def __init__(self, keepalive_idle=60, **kwargs):
+        self.keepalive_idle = keepalive_idle
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        options = list(HTTPConnection.default_socket_options)
+        options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+        if hasattr(socket, "TCP_KEEPIDLE"):
+            options.append((socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, self.keepalive_idle))
+            options.append((socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, max(1, self.keepalive_idle // 4)))
+        kwargs["socket_options"] = options
+        super().init_poolmanager(*args, **kwargs)
+
+
+@st.cache_resource
+def get_http_session(pool_size, keepalive_idle):
+    """One requests.Session per process, shared by every rerun and every user session"""
+    session = requests.Session()
+    adapter = KeepAliveAdapter(
+        keepalive_idle=keepalive_idle,
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(HEADERS)
+    session.headers["Connection"] = "keep-alive"
+    return session
+
+
+def get_connection_stats():
+    """Requests sent vs. TCP/TLS connections opened by the shared pool"""
+    stats = {"requests": 0, "connections_opened": 0, "connections_reused": 0}
+    if not SUPABASE_CONFIGURED:
+        return stats
+    session = get_http_session(SUPABASE_POOL_SIZE, SUPABASE_KEEPALIVE_IDLE)
+    seen = set()
+    for adapter in session.adapters.values():
+        if id(adapter) in seen:
+            continue
+        seen.add(id(adapter))
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools[key]
+            stats["requests"] += pool.num_requests
+            stats["connections_opened"] += pool.num_connections
+    stats["connections_reused"] = max(0, stats["requests"] - stats["connections_opened"])
+    return stats
+
+
+# ==================== USAGE EVENT LOGGER ====================
+@st.cache_resource
+def get_usage_logger(batch_size, flush_interval, max_queue):
+    session = get_http_session(SUPABASE_POOL_SIZE, SUPABASE_KEEPALIVE_IDLE)
+    return UsageLogger(session, f"{SUPABASE_URL}/rest/v1/usage_logs", batch_size, flush_interval, max_queue)
+
+
+def log_event(action, page):
+    """Record a usage event for STATS.md without waiting on the network"""
+    if not SUPABASE_CONFIGURED:
+        return
+    get_usage_logger(USAGE_LOG_BATCH, USAGE_LOG_INTERVAL, USAGE_LOG_QUEUE).log({
+        "user_type": "registered" if st.session_state.get("user_id") else "guest",
+        "action": action,
+        "page": page,
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat()
+    })
+
+
+def log_result_event(action, page, result):
+    """Log a calculation once per distinct result instead of on every rerun that shows it"""
+    logged = st.session_state.setdefault("logged_results", {})
+    if logged.get(action) != result:
+        logged[action] = result
+        log_event(action, page)
+
+
+# ==================== USER DATA CACHE ====================
+@st.cache_resource
+def get_user_cache(ttl, maxsize):
+    return UserDataCache(ttl, maxsize)
+
+
+def user_cache():
+    return get_user_cache(USER_CACHE_TTL, USER_CACHE_SIZE)
+
+
+# ==================== PER-RERUN READ CACHE ====================
+# Cleared at the top of every script run and every fragment run (fragments don't
+# re-execute the module), so identical GETs within one run hit Supabase only once.
+_rerun_reads = {}
+READ_CACHE_STATS = {"hits": 0, "misses": 0}
+
+def _count_read(outcome):
+    READ_CACHE_STATS[outcome] += 1
+    totals = st.session_state.setdefault("read_cache_totals", {"hits": 0, "misses": 0})
+    totals[outcome] += 1
 
 # ==================== SUPABASE HELPER FUNCTIONS ====================
-def supabase_request(method, endpoint, data=None, params=None):
+def supabase_request(method, endpoint, data=None, params=None, quiet=False):
     if not SUPABASE_CONFIGURED:
         return None
+    if method == "GET":
+        cache_key = (endpoint, tuple(sorted((params or {}).items())))
+        if cache_key in _rerun_reads:
+            _count_read("hits")
+            return _rerun_reads[cache_key]
+        _count_read("misses")
+    else:
+        # Any write may change what the cached reads would return
+        _rerun_reads.clear()
     url = f"{SUPABASE_URL}/rest/v1/{endpoint}"
+    session = get_http_session(SUPABASE_POOL_SIZE, SUPABASE_KEEPALIVE_IDLE)
     try:
-        if method == "GET":
-            response = requests.get(url, headers=HEADERS, params=params, timeout=10)
-        elif method == "POST":
-            response = requests.post(url, headers=HEADERS, json=data, timeout=10)
-        elif method == "PATCH":
-            response = requests.patch(url, headers=HEADERS, json=data, params=params, timeout=10)
-        elif method == "DELETE":
-            response = requests.delete(url, headers=HEADERS, params=params, timeout=10)
+        response = session.request(
+            method, url,
+            json=data if method in ("POST", "PATCH") else None,
+            params=params if method != "POST" else None,
+            timeout=SUPABASE_TIMEOUTS.get(method, 10)
+        )
         response.raise_for_status()
-        return response.json() if response.text else []
+        result = response.json() if response.text else []
+        if method == "GET":
+            _rerun_reads[cache_key] = result
+        return result
     except requests.exceptions.RequestException as e:
-        st.error(f"Database error: {str(e)}")
+        if not quiet:
+            st.error(f"Database error: {str(e)}")
         return None
 
+# ==================== STORAGE BACKENDS ====================
+@st.cache_resource
+def get_storage(backend, sqlite_path):
+    """One backend object per process; set STORAGE_BACKEND = "sqlite" in secrets.toml to store locally"""
+    if backend == "sqlite":
+        return SQLiteStorage(sqlite_path)
+    if backend == "supabase":
+        return SupabaseStorage(supabase_request)
+    raise ValueError(f"Unknown STORAGE_BACKEND: {backend!r} (expected one of {', '.join(BACKENDS)})")
+
+
+def storage():
+    return get_storage(STORAGE_BACKEND, SQLITE_PATH) if STORAGE_CONFIGURED else None
+
 # ==================== AUTHENTICATION FUNCTIONS ====================
 def hash_password(password):
     return hashlib.sha256(password.encode()).hexdigest()
 
 def create_user(username, email, password):
+    if not STORAGE_CONFIGURED:
+        return False, "Database not configured!"
     try:
         password_hash = hash_password(password)
-        data = {"username": username, "email": email, "password_hash": password_hash}
-        result = supabase_request("POST", "users", data)
-        if result:
+        if storage().add_user(username, email, password_hash):
             return True, "Account created successfully!"
         else:
             return False, "Username or email already exists!"
@@ -255,16 +305,12 @@ def create_user(username, email, password):
         return False, f"Error: {str(e)}"
 
 def verify_user(username, password):
+    if not STORAGE_CONFIGURED:
+        return None
     try:
         password_hash = hash_password(password)
-        params = {
-            "username": f"eq.{username}",
-            "password_hash": f"eq.{password_hash}",
-            "select": "id,username,email"
-        }
-        result = supabase_request("GET", "users", params=params)
-        if result and len(result) > 0:
-            user = result[0]
+        user = storage().find_user(username, password_hash)
+        if user:
             return (user['id'], user['username'], user['email'])
         return None
     except Exception as e:
@@ -273,68 +319,147 @@ def verify_user(username, password):
 
 # ==================== DATA STORAGE FUNCTIONS ====================
 def save_semester_data(user_id, academic_year, semester_name, gpa, total_units, courses):
+    semester = {"year": academic_year, "name": semester_name, "gpa": gpa, "units": total_units, "courses": courses}
+    return save_semesters_batch(user_id, [semester])[0]
+
+def save_semesters_batch(user_id, semesters):
+    """Save semesters in two round trips: one bulk insert for the semester rows, one for all their courses.
+    Returns a (success, message) pair per semester, in input order."""
+    if not STORAGE_CONFIGURED:
+        return [(False, "Database not configured!")] * len(semesters)
+    attempted_write = False
     try:
-        semester_data = {
+        semester_rows = [{
             "user_id": user_id,
-            "academic_year": academic_year,
-            "semester_name": semester_name,
-            "gpa": float(gpa),
-            "total_units": int(total_units)
-        }
-        semester_result = supabase_request("POST", "semesters", semester_data)
-        if not semester_result or len(semester_result) == 0:
-            return False, "Failed to save semester"
-        semester_id = semester_result[0]['id']
-        for course in courses:
-            course_data = {
-                "semester_id": semester_id,
-                "course_name": course['name'],
-                "course_code": course.get('code', ''),
-                "grade": course['grade'],
-                "units": int(course['unit']),
-                "grade_point": float(course['point'])
-            }
-            supabase_request("POST", "courses", course_data)
-        return True, "Semester data saved successfully!"
+            "academic_year": sem['year'],
+            "semester_name": sem['name'],
+            "gpa": float(sem['gpa']),
+            "total_units": int(sem['units'])
+        } for sem in semesters]
+        attempted_write = True
+        semester_result = storage().add_semesters(semester_rows)
+        if not semester_result or len(semester_result) != len(semesters):
+            return [(False, "Failed to save semester")] * len(semesters)
+
+        course_rows = []
+        owners = {}
+        for idx, (sem, saved) in enumerate(zip(semesters, semester_result)):
+            owners[saved['id']] = idx
+            for course in sem['courses']:
+                course_rows.append({
+                    "semester_id": saved['id'],
+                    "course_name": course['name'],
+                    "course_code": course.get('code', ''),
+                    "grade": course['grade'],
+                    "units": int(course['unit']),
+                    "grade_point": float(course['point'])
+                })
+
+        failed = [[] for _ in semesters]
+        if course_rows:
+            for row in storage().add_courses(course_rows):
+                failed[owners[row['semester_id']]].append(row['course_code'] or row['course_name'])
+
+        results = []
+        for bad in failed:
+            if bad:
+                results.append((False, f"Semester saved, but {len(bad)} course(s) failed: {', '.join(bad)}"))
+            else:
+                results.append((True, "Semester data saved successfully!"))
+        return results
     except Exception as e:
-        return False, f"Error saving data: {str(e)}"
+        return [(False, f"Error saving data: {str(e)}")] * len(semesters)
+    finally:
+        # Even a failed or partial write may have stored rows, so never keep serving the old ones
+        if attempted_write:
+            user_cache().invalidate(user_id)
 
 def get_user_semesters(user_id):
+    if not STORAGE_CONFIGURED:
+        return []
+    cached = user_cache().get(user_id, "semesters")
+    if cached is not None:
+        return cached
     try:
-        params = {
-            "user_id": f"eq.{user_id}",
-            "select": "id,academic_year,semester_name,gpa,total_units,created_at",
-            "order": "academic_year,semester_name"
-        }
-        result = supabase_request("GET", "semesters", params=params)
-        return result if result else []
+        result = storage().semesters(user_id)
+        if result is None:
+            return []
+        user_cache().set(user_id, "semesters", result)
+        return result
     except Exception as e:
         st.error(f"Error fetching semesters: {str(e)}")
         return []
 
-def get_semester_courses(semester_id):
+def get_courses_by_semester(semester_ids, user_id=None):
+    """Fetch the courses of many semesters in one request, grouped by semester id.
+    Pass the owner's user_id to serve and fill the cross-session user cache."""
+    grouped = {sem_id: [] for sem_id in semester_ids}
+    if not semester_ids or not STORAGE_CONFIGURED:
+        return grouped
+    cached = user_cache().get(user_id, "courses") if user_id is not None else None
+    if cached is not None and all(sem_id in cached for sem_id in semester_ids):
+        return {sem_id: cached[sem_id] for sem_id in semester_ids}
     try:
-        params = {
-            "semester_id": f"eq.{semester_id}",
-            "select": "course_name,course_code,grade,units,grade_point"
-        }
-        result = supabase_request("GET", "courses", params=params)
-        return result if result else []
+        result = storage().courses(semester_ids)
+        if result is None:
+            return grouped
+        for course in result:
+            grouped.setdefault(course['semester_id'], []).append(course)
+        if user_id is not None:
+            user_cache().set(user_id, "courses", {**(cached or {}), **grouped})
+        return grouped
     except Exception as e:
         st.error(f"Error fetching courses: {str(e)}")
-        return []
+        return grouped
+
+def _summary(total_points, total_units, semester_count, source):
+    return {
+        "cgpa": total_points / total_units if total_units > 0 else 0.0,
+        "total_points": total_points,
+        "total_units": total_units,
+        "semester_count": semester_count,
+        "source": source
+    }
 
-def calculate_overall_cgpa(user_id):
-    try:
+def get_cgpa_summary(user_id):
+    """CGPA, units and semester count for a user from the backend's stored totals,
+    falling back to summing semester rows when it has none"""
+    if not STORAGE_CONFIGURED:
+        return _summary(0.0, 0, 0, "none")
+    cached = user_cache().get(user_id, "summary")
+    if cached is not None:
+        return cached
+    result = storage().totals(user_id)
+    if result is None:
         semesters = get_user_semesters(user_id)
-        if not semesters:
-            return 0.0
-        total_points = sum(sem['gpa'] * sem['total_units'] for sem in semesters)
-        total_units = sum(sem['total_units'] for sem in semesters)
-        return total_points / total_units if total_units > 0 else 0.0
-    except Exception as e:
-        st.error(f"Error calculating CGPA: {str(e)}")
-        return 0.0
+        summary = _summary(
+            sum(sem['gpa'] * sem['total_units'] for sem in semesters),
+            sum(sem['total_units'] for sem in semesters),
+            len(semesters),
+            "semesters"
+        )
+    else:
+        row, source = result
+        summary = _summary(float(row['total_points']), int(row['total_units']), int(row['semester_count']), source)
+    user_cache().set(user_id, "summary", summary)
+    return summary
+
+def verify_user_totals(user_id, semesters, courses_by_semester):
+    """Check the stored user_totals row against the raw rows already loaded for the records page,
+    and rebuild it server-side if they disagree. Returns True when the totals were consistent."""
+    summary = get_cgpa_summary(user_id)
+    if summary['source'] != "totals":
+        return True
+    courses = [course for sem in semesters for course in courses_by_semester.get(sem['id'], [])]
+    total_points = sum(course['grade_point'] * course['units'] for course in courses)
+    total_units = sum(course['units'] for course in courses)
+    if (abs(total_points - summary['total_points']) < 1e-6
+            and total_units == summary['total_units']
+            and len(semesters) == summary['semester_count']):
+        return True
+    storage().rebuild_totals(user_id)
+    user_cache().invalidate(user_id)
+    return False
 
 # ==================== SESSION STATE INITIALIZATION ====================
 if 'logged_in' not in st.session_state:
@@ -349,6 +474,44 @@ if 'show_tutorial' not in st.session_state:
 if 'start_tab' not in st.session_state:
     st.session_state.start_tab = None
 
+# ==================== PARTIAL RERUNS & TIMING ====================
+def record_timing(name, seconds):
+    samples = st.session_state.setdefault("rerun_timings", {}).setdefault(name, [])
+    samples.append(seconds * 1000)
+    del samples[:-20]
+
+def partial_rerun(func):
+    """Make func an st.fragment, so its own widgets rerun just func instead of the whole page, and time each run"""
+    @functools.wraps(func)
+    def timed(*args, **kwargs):
+        started = time.perf_counter()
+        _rerun_reads.clear()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            record_timing(func.__name__, time.perf_counter() - started)
+    return st.fragment(timed)
+
+def show_timings():
+    """Rerun latencies and cache/pool counters in the sidebar when the app is opened with ?debug=timing"""
+    if st.query_params.get("debug") != "timing":
+        return
+    with st.sidebar:
+        st.markdown("### ⏱️ Rerun timings (ms)")
+        for name, samples in st.session_state.get("rerun_timings", {}).items():
+            ordered = sorted(samples)
+            st.write(f"**{name}**: last {samples[-1]:.0f}, median {ordered[len(ordered) // 2]:.0f} ({len(samples)} runs)")
+        if SUPABASE_CONFIGURED:
+            pool = get_connection_stats()
+            st.caption(f"HTTP pool: {pool['requests']} requests over {pool['connections_opened']} connections "
+                       f"({pool['connections_reused']} reused)")
+            usage = get_usage_logger(USAGE_LOG_BATCH, USAGE_LOG_INTERVAL, USAGE_LOG_QUEUE).snapshot()
+            st.caption(f"Usage log: {usage['sent']} sent of {usage['queued']} queued; dropped {usage['dropped_full']} "
+                       f"(buffer full) and {usage['dropped_failed']} (failed batches)")
+        session_reads = st.session_state.get("read_cache_totals", {"hits": 0, "misses": 0})
+        st.caption(f"Read cache: {READ_CACHE_STATS['hits']} hits, {READ_CACHE_STATS['misses']} misses this run "
+                   f"({session_reads['hits']} / {session_reads['misses']} this session)")
+
 # ==================== WELCOME PAGE (LANDING PAGE) ====================
 def welcome_page():
     """Landing page — action cards go directly to GPA or CGPA calculator"""
@@ -376,6 +539,7 @@ def welcome_page():
             </div>
         """, unsafe_allow_html=True)
         if st.button("Calculate GPA →", key="btn_gpa", type="primary", use_container_width=True):
+            log_event("guest_mode_entered", "landing")
             st.session_state.logged_in = True
             st.session_state.start_tab = "gpa"
             st.rerun()
@@ -389,6 +553,7 @@ def welcome_page():
             </div>
         """, unsafe_allow_html=True)
         if st.button("Calculate CGPA →", key="btn_cgpa", type="primary", use_container_width=True):
+            log_event("guest_mode_entered", "landing")
             st.session_state.logged_in = True
             st.session_state.start_tab = "cgpa"
             st.rerun()
@@ -404,6 +569,7 @@ def welcome_page():
         </div>
     """, unsafe_allow_html=True)
     if st.button("Plan My Grades →", key="btn_goal", type="primary", use_container_width=True):
+        log_event("guest_mode_entered", "landing")
         st.session_state.logged_in = True
         st.session_state.start_tab = "goal"
         st.rerun()
@@ -448,6 +614,7 @@ def welcome_page():
                         st.session_state.logged_in = True
                         st.session_state.username = user[1]
                         st.session_state.user_id = user[0]
+                        log_event("user_login", "auth_page")
                         st.success(f"Welcome back, {user[1]}!")
                         st.rerun()
                     else:
@@ -468,6 +635,7 @@ def welcome_page():
                     else:
                         success, message = create_user(signup_username, signup_email, signup_password)
                         if success:
+                            log_event("user_signup", "auth_page")
                             st.success(message)
                             st.info("Please login with your new account!")
                         else:
@@ -615,17 +783,19 @@ def main_calculator():
                 st.rerun()
 
     if st.session_state.user_id:
-        overall_cgpa = calculate_overall_cgpa(st.session_state.user_id)
-        semesters = get_user_semesters(st.session_state.user_id)
-        total_units = sum([sem['total_units'] for sem in semesters])
+        summary = get_cgpa_summary(st.session_state.user_id)
         st.markdown(f"**Welcome back, {st.session_state.username}!** 👋")
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.metric("📊 CGPA", f"{overall_cgpa:.3f}")
+            st.metric("📊 CGPA", f"{summary['cgpa']:.3f}")
         with col2:
-            st.metric("📖 Units", total_units)
+            st.metric("📖 Units", summary['total_units'])
         with col3:
-            st.metric("📅 Semesters", len(semesters))
+            st.metric("📅 Semesters", summary['semester_count'])
+        notice = st.session_state.pop("save_notice", None)
+        if notice:
+            st.success(notice)
+            st.balloons()
         st.markdown("---")
 
     # Determine default tab index based on start_tab
@@ -641,22 +811,24 @@ def main_calculator():
             st.rerun()
         return
 
-    tab1, tab2, tab3, tab4 = st.tabs(["📊 Calculate GPA/CGPA", "🎯 What Do I Need?", "📚 My Records", "ℹ️ Tutorial"])
+    # Only the selected tool runs; st.tabs would execute (and query the DB for) all four every rerun
+    tools = ["📊 Calculate GPA/CGPA", "🎯 What Do I Need?", "📚 My Records", "ℹ️ Tutorial"]
+    if start in ("gpa", "cgpa"):
+        st.session_state.active_tool = tools[0]
+    active_tool = st.radio("Tool", tools, key="active_tool", horizontal=True, label_visibility="collapsed")
+    st.markdown("---")
 
-    with tab1:
+    if active_tool == tools[0]:
         calculate_gpa_cgpa()
-
-    with tab2:
+    elif active_tool == tools[1]:
         what_do_i_need()
-
-    with tab3:
+    elif active_tool == tools[2]:
         if st.session_state.user_id:
             view_records()
         else:
             st.info("📝 Create a free account to save and view your academic records!")
             show_signup_inline()
-
-    with tab4:
+    else:
         quick_tutorial()
 
     # Clear start_tab after render so it doesn't persist
@@ -686,10 +858,7 @@ def calculate_gpa_cgpa():
 
     scale = st.radio("Choose Grading Scale:", ("5.0 Scale", "4.0 Scale"), horizontal=True)
 
-    if scale == "5.0 Scale":
-        grade_map = {'A':5.0, 'B':4.0, 'C':3.0, 'D':2.0, 'E':1.0, 'F':0.0}
-    else:
-        grade_map = {'A':4.0, 'B':3.0, 'C':2.0, 'D':1.0, 'F':0.0}
+    grade_map = GRADE_SCALES[scale]
 
     if calc_type == "📊 Single Semester GPA":
         calculate_single_gpa(grade_map)
@@ -697,6 +866,7 @@ def calculate_gpa_cgpa():
         calculate_multi_semester_cgpa(grade_map)
 
 
+@partial_rerun
 def calculate_single_gpa(grade_map):
     st.markdown("#### Enter Your Semester Details")
     with st.expander("📝 Semester Information (Optional)"):
@@ -710,28 +880,28 @@ def calculate_single_gpa(grade_map):
     st.markdown("---")
     st.markdown("#### Your Courses")
 
-    semester_units = 0
-    semester_points = 0
     courses_list = []
 
-    for c in range(1, num_courses + 1):
-        with st.container():
-            st.markdown(f"**Course {c}**")
-            col1, col2, col3 = st.columns([3, 1, 1])
-            with col1:
-                course_code = st.text_input("Course Code", key=f"code_{c}", placeholder="e.g., MAT101")
-            with col2:
-                grade_input = st.selectbox("Grade", list(grade_map.keys()), key=f"grade_{c}")
-            with col3:
-                unit = st.number_input("Units", min_value=1, max_value=6, value=3, step=1, key=f"unit_{c}")
-            point = grade_map[grade_input]
-            if course_code:
-                semester_units += unit
-                semester_points += point * unit
-                courses_list.append({"name": course_code, "code": course_code, "grade": grade_input, "unit": unit, "point": point})
+    # Inputs inside a form only reach the script on submit, so typing doesn't rerun the page
+    with st.form("gpa_courses_form", border=False):
+        for c in range(1, num_courses + 1):
+            with st.container():
+                st.markdown(f"**Course {c}**")
+                col1, col2, col3 = st.columns([3, 1, 1])
+                with col1:
+                    course_code = st.text_input("Course Code", key=f"code_{c}", placeholder="e.g., MAT101")
+                with col2:
+                    grade_input = st.selectbox("Grade", list(grade_map.keys()), key=f"grade_{c}")
+                with col3:
+                    unit = st.number_input("Units", min_value=1, max_value=6, value=3, step=1, key=f"unit_{c}")
+                if course_code:
+                    courses_list.append({"name": course_code, "code": course_code, "grade": grade_input, "unit": unit, "point": grade_map[grade_input]})
+        st.form_submit_button("🧮 Calculate GPA", type="primary", use_container_width=True)
 
     if courses_list:
-        semester_gpa = semester_points / semester_units if semester_units > 0 else 0
+        totals = semester_totals(courses_list)
+        semester_gpa, semester_units, semester_points = totals['gpa'], totals['units'], totals['points']
+        log_result_event("calculate_gpa", "gpa_calculator", (semester_units, semester_points))
         st.markdown("---")
         st.markdown("### 📊 Your Results")
         col1, col2, col3 = st.columns(3)
@@ -746,75 +916,117 @@ def calculate_single_gpa(grade_map):
         with col1:
             if st.session_state.user_id and academic_year:
                 if st.button("💾 Save This Semester", type="primary", use_container_width=True):
+                    log_event("save_semester", "gpa_calculator")
                     success, message = save_semester_data(
                         st.session_state.user_id, academic_year, semester_name,
                         semester_gpa, semester_units, courses_list
                     )
                     if success:
-                        st.success(message)
-                        st.balloons()
+                        # The header metrics live outside this fragment; rerun the app so they count the new semester
+                        st.session_state.save_notice = message
+                        st.rerun()
                     else:
                         st.error(message)
             elif not st.session_state.user_id:
                 st.info("💡 Create account to save")
         with col2:
-            report = generate_report(
-                academic_year if 'academic_year' in locals() else "N/A",
-                semester_name if 'semester_name' in locals() else "N/A",
-                semester_gpa, semester_units, courses_list
+            year = academic_year if 'academic_year' in locals() else "N/A"
+            semester = semester_name if 'semester_name' in locals() else "N/A"
+            download_report(
+                "📥 Download Report", "gpa_report",
+                lambda fmt: generate_report(year, semester, semester_gpa, semester_units, courses_list, fmt),
+                key="gpa_report", use_container_width=True
             )
-            st.download_button("📥 Download Report", report, "gpa_report.txt", "text/plain", use_container_width=True)
         with col3:
             if st.button("🔄 Calculate Another", use_container_width=True):
                 st.rerun()
 
 
+def empty_course_table(rows=5):
+    return pd.DataFrame({
+        "Course Code": pd.Series([None] * rows, dtype="object"),
+        "Grade": pd.Series(["A"] * rows, dtype="object"),
+        "Units": pd.Series([3] * rows, dtype="int64")
+    })
+
+
+def course_table_config(grade_map):
+    return {
+        "Course Code": st.column_config.TextColumn("Course Code", help="e.g., MAT101"),
+        "Grade": st.column_config.SelectboxColumn("Grade", options=list(grade_map.keys()), required=True, default="A"),
+        "Units": st.column_config.NumberColumn("Units", min_value=1, max_value=6, step=1, required=True, default=3)
+    }
+
+
+def summarize_transcript(semester_tables, grade_map):
+    """Score every semester's course table in one vectorized pass.
+    semester_tables: list of (year, semester name, DataFrame). Returns (semester dicts, skipped row count)."""
+    frames = [table.assign(semester=idx) for idx, (_, _, table) in enumerate(semester_tables)]
+    transcript = pd.concat(frames, ignore_index=True)
+    codes = transcript["Course Code"].fillna("").astype(str).str.strip()
+    entered = codes != ""
+    valid = entered & transcript["Grade"].isin(list(grade_map.keys())) & transcript["Units"].notna()
+    transcript = transcript[valid].assign(**{"Course Code": codes[valid]})
+
+    points = grade_points_array(transcript["Grade"].to_numpy(dtype=str), grade_map)
+    units = transcript["Units"].to_numpy(dtype=float)
+    sem_ids, gpa, sem_units, sem_points = grouped_gpa(transcript["semester"].to_numpy(), points, units)
+
+    semesters = []
+    rows_by_semester = transcript.groupby("semester", sort=True)
+    for sem_idx, sem_gpa, total_units, total_points in zip(sem_ids, gpa, sem_units, sem_points):
+        year, name, _ = semester_tables[sem_idx]
+        rows = rows_by_semester.get_group(sem_idx)
+        courses = [
+            {"name": code, "code": code, "grade": grade, "unit": int(unit), "point": grade_map[grade]}
+            for code, grade, unit in zip(rows["Course Code"], rows["Grade"], rows["Units"])
+        ]
+        semesters.append({
+            "index": int(sem_idx) + 1, "year": year, "name": name,
+            "gpa": float(sem_gpa), "units": int(total_units), "points": float(total_points),
+            "courses": courses
+        })
+    return semesters, int(entered.sum() - valid.sum())
+
+
+@partial_rerun
 def calculate_multi_semester_cgpa(grade_map):
     st.markdown("#### Calculate Your Overall CGPA")
     st.info("💡 Enter grades for 2 or more semesters to calculate your cumulative GPA")
 
     num_semesters = st.number_input("How many semesters?", min_value=2, max_value=12, value=2, step=1)
-    all_semesters_data = []
-    total_all_points = 0
-    total_all_units = 0
+    semester_tables = []
+    gpa_slots = []
 
     for sem_num in range(1, num_semesters + 1):
         st.markdown(f"### 📅 Semester {sem_num}")
         with st.expander(f"Enter courses for Semester {sem_num}", expanded=(sem_num == 1)):
-            col1, col2 = st.columns(2)
-            with col1:
-                academic_year = st.text_input("Academic Year", key=f"year_{sem_num}", placeholder="2023/2024")
-            with col2:
-                semester_name = st.selectbox("Semester", ["First Semester", "Second Semester"], key=f"semname_{sem_num}")
-
-            num_courses = st.number_input(f"Number of courses in Semester {sem_num}:", min_value=1, max_value=15, value=5, step=1, key=f"numcourses_{sem_num}")
-            semester_units = 0
-            semester_points = 0
-            courses_list = []
-
-            for c in range(1, num_courses + 1):
-                col1, col2, col3 = st.columns([3, 1, 1])
+            # Inputs inside a form only reach the script on submit, so typing doesn't rerun the page
+            with st.form(f"sem{sem_num}_form", border=False):
+                col1, col2 = st.columns(2)
                 with col1:
-                    course_code = st.text_input("Course Code", key=f"sem{sem_num}_code_{c}", placeholder="e.g., MAT101")
+                    academic_year = st.text_input("Academic Year", key=f"year_{sem_num}", placeholder="2023/2024")
                 with col2:
-                    grade_input = st.selectbox("Grade", list(grade_map.keys()), key=f"sem{sem_num}_grade_{c}")
-                with col3:
-                    unit = st.number_input("Units", min_value=1, max_value=6, value=3, step=1, key=f"sem{sem_num}_unit_{c}")
-                point = grade_map[grade_input]
-                if course_code:
-                    semester_units += unit
-                    semester_points += point * unit
-                    courses_list.append({"name": course_code, "code": course_code, "grade": grade_input, "unit": unit, "point": point})
-
-            if courses_list:
-                semester_gpa = semester_points / semester_units if semester_units > 0 else 0
-                st.success(f"✅ Semester {sem_num} GPA: **{semester_gpa:.3f}** ({semester_units} units)")
-                total_all_points += semester_points
-                total_all_units += semester_units
-                all_semesters_data.append({"year": academic_year, "name": semester_name, "gpa": semester_gpa, "units": semester_units, "courses": courses_list})
-
-    if total_all_units > 0:
-        overall_cgpa = total_all_points / total_all_units
+                    semester_name = st.selectbox("Semester", ["First Semester", "Second Semester"], key=f"semname_{sem_num}")
+                st.caption("Add a row per course; use the ➕ at the bottom of the table for more courses.")
+                table = st.data_editor(
+                    empty_course_table(), key=f"sem{sem_num}_courses", num_rows="dynamic",
+                    column_config=course_table_config(grade_map), hide_index=True, use_container_width=True
+                )
+                st.form_submit_button(f"✅ Update Semester {sem_num}", use_container_width=True)
+            gpa_slots.append(st.empty())
+        semester_tables.append((academic_year, semester_name, table))
+
+    all_semesters_data, skipped = summarize_transcript(semester_tables, grade_map)
+    for sem in all_semesters_data:
+        gpa_slots[sem['index'] - 1].success(f"✅ Semester {sem['index']} GPA: **{sem['gpa']:.3f}** ({sem['units']} units)")
+    if skipped:
+        st.warning(f"⚠️ {skipped} course(s) skipped: each course needs a grade on this scale and 1–6 units")
+
+    overall = cumulative_totals(all_semesters_data)
+    if overall['units'] > 0:
+        overall_cgpa, total_all_units = overall['cgpa'], overall['units']
+        log_result_event("calculate_cgpa", "cgpa_calculator", (total_all_units, overall['points']))
         st.markdown("---")
         st.markdown("### 🎓 Your Overall CGPA")
         col1, col2, col3 = st.columns(3)
@@ -829,33 +1041,101 @@ def calculate_multi_semester_cgpa(grade_map):
             for idx, sem in enumerate(all_semesters_data, 1):
                 st.write(f"**Semester {idx}**: {sem['year']} {sem['name']} - GPA: {sem['gpa']:.3f} ({sem['units']} units)")
 
-        cgpa_report = generate_cgpa_report(all_semesters_data, overall_cgpa, total_all_units)
-        st.download_button("📥 Download Full CGPA Report", cgpa_report, "cgpa_report.txt", "text/plain", use_container_width=True, type="primary")
+        download_report(
+            "📥 Download Full CGPA Report", "cgpa_report",
+            lambda fmt: generate_cgpa_report(all_semesters_data, overall_cgpa, total_all_units, fmt),
+            key="cgpa_report", use_container_width=True, type="primary"
+        )
 
         if st.session_state.user_id:
             if st.button("💾 Save All Semesters", use_container_width=True):
-                success_count = 0
-                for sem in all_semesters_data:
-                    success, msg = save_semester_data(st.session_state.user_id, sem['year'], sem['name'], sem['gpa'], sem['units'], sem['courses'])
-                    if success:
-                        success_count += 1
+                log_event("save_all_semesters", "cgpa_calculator")
+                results = save_semesters_batch(st.session_state.user_id, all_semesters_data)
+                success_count = sum(1 for success, msg in results if success)
                 if success_count == len(all_semesters_data):
-                    st.success(f"✅ All {success_count} semesters saved successfully!")
-                    st.balloons()
+                    st.session_state.save_notice = f"✅ All {success_count} semesters saved successfully!"
+                    st.rerun()
                 else:
                     st.warning(f"Saved {success_count} out of {len(all_semesters_data)} semesters")
+                    for idx, (success, msg) in enumerate(results, 1):
+                        if not success:
+                            st.error(f"Semester {idx}: {msg}")
 
 
 # ==================== WHAT DO I NEED ====================
+PLAN_LABELS = {
+    "balanced": ("Balanced", "Same GPA every semester"),
+    "min_effort": ("Least Effort", "Lean on your heaviest, then latest semesters"),
+    "front_loaded": ("Start Strong", "Work hardest early, ease off later"),
+}
+
+OUTCOME_SIMULATIONS = 100_000
+
+def user_grade_history(user_id):
+    """Stored grade points and units of every course the user has saved, oldest first"""
+    semesters = get_user_semesters(user_id)
+    courses_by_semester = get_courses_by_semester([sem['id'] for sem in semesters], user_id)
+    courses = [course for sem in semesters for course in courses_by_semester.get(sem['id'], [])]
+    return tuple(float(course['grade_point']) for course in courses), tuple(course['units'] for course in courses)
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def simulate_target(user_id, target_cgpa, future_units, current_cgpa, completed_units, grade_points, course_units):
+    """Chance of reaching the target if future grades follow the user's past ones.
+    Cached per user, target and unit plan (plus the inputs that feed the simulation)."""
+    points, probs = grade_distribution(grade_points)
+    if points.size == 0:
+        return None
+    final = simulate_final_cgpa(current_cgpa, completed_units, future_units, points, probs,
+                                course_units=course_units, n_sims=OUTCOME_SIMULATIONS, seed=0)
+    outcome = target_probability(final, target_cgpa)
+    counts, edges = np.histogram(final, bins=30)
+    outcome["histogram"] = pd.Series(counts, index=np.round((edges[:-1] + edges[1:]) / 2, 2), name="Simulations")
+    return outcome
+
+def show_target_probability(current_cgpa, completed_credits, target_cgpa, future_units, max_gpa):
+    grade_points, units = user_grade_history(st.session_state.user_id)
+    if not grade_points:
+        return
+    if max(grade_points) > max_gpa + 1e-9:
+        st.caption(f"🎲 Outcome simulation skipped: your saved grades go up to {max(grade_points):g} points, "
+                   f"above this scale's {max_gpa:.1f}, so they can't predict grades on it.")
+        return
+    outcome = simulate_target(
+        st.session_state.user_id, target_cgpa, tuple(future_units),
+        current_cgpa, completed_credits, grade_points, float(np.median(units))
+    )
+    if outcome is None:
+        return
+    st.markdown("#### 🎲 If You Keep Performing Like Before")
+    st.caption(f"{OUTCOME_SIMULATIONS:,} simulated futures, each course graded like one of your {len(grade_points)} past courses")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Chance of Target", f"{outcome['probability']:.0%}")
+    with col2:
+        st.metric("Likely CGPA", f"{outcome['median']:.2f}")
+    with col3:
+        st.metric("80% Range", f"{outcome['p10']:.2f} – {outcome['p90']:.2f}")
+    st.bar_chart(outcome["histogram"])
+
+@partial_rerun
 def what_do_i_need():
     st.markdown("### 🎯 Plan Your Future Grades")
     st.info("Find out what GPA you need in upcoming semesters to reach your target CGPA")
 
+    scale = st.radio("Grading Scale:", ("5.0 Scale", "4.0 Scale"), horizontal=True, key="goal_scale")
+    max_gpa = scale_max(GRADE_SCALES[scale])
+
     if st.session_state.user_id:
-        current_cgpa_auto = calculate_overall_cgpa(st.session_state.user_id)
-        semesters = get_user_semesters(st.session_state.user_id)
-        completed_credits_auto = sum([sem['total_units'] for sem in semesters])
-        if current_cgpa_auto > 0:
+        summary = get_cgpa_summary(st.session_state.user_id)
+        current_cgpa_auto = summary['cgpa']
+        completed_credits_auto = summary['total_units']
+        if current_cgpa_auto > max_gpa + 1e-9:
+            # Saved records are on another scale; converting them would only guess
+            st.warning(f"⚠️ Your saved CGPA ({current_cgpa_auto:.3f}) is above the {scale}'s maximum of {max_gpa:.1f}, "
+                       f"so it was recorded on a different scale. Enter your CGPA on the {scale} below, "
+                       f"or switch to the scale your records use.")
+            use_auto = False
+        elif current_cgpa_auto > 0:
             st.success(f"📊 Your current CGPA: **{current_cgpa_auto:.3f}** with **{completed_credits_auto}** completed units")
             use_auto = st.checkbox("Use my current data", value=True)
         else:
@@ -866,73 +1146,75 @@ def what_do_i_need():
         else:
             col1, col2 = st.columns(2)
             with col1:
-                current_cgpa = st.number_input("Current CGPA:", min_value=0.0, max_value=5.0, step=0.01, format="%.2f")
+                current_cgpa = st.number_input("Current CGPA:", min_value=0.0, max_value=max_gpa, step=0.01, format="%.2f")
             with col2:
                 completed_credits = st.number_input("Completed Units:", min_value=0, step=1)
     else:
         col1, col2 = st.columns(2)
         with col1:
-            current_cgpa = st.number_input("Current CGPA:", min_value=0.0, max_value=5.0, step=0.01, format="%.2f")
+            current_cgpa = st.number_input("Current CGPA:", min_value=0.0, max_value=max_gpa, step=0.01, format="%.2f")
         with col2:
             completed_credits = st.number_input("Completed Units:", min_value=0, step=1)
 
     st.markdown("#### Upcoming Semesters")
-    col1, col2 = st.columns(2)
-    with col1:
-        sem1_credits = st.number_input("Semester 1 Units:", min_value=1, value=18, step=1)
-    with col2:
-        sem2_credits = st.number_input("Semester 2 Units:", min_value=1, value=18, step=1)
+    num_future = st.number_input("Number of semesters left:", min_value=1, max_value=12, value=2, step=1)
+    future_units = []
+    for row_start in range(0, num_future, 4):
+        cols = st.columns(4)
+        for i in range(row_start, min(row_start + 4, num_future)):
+            with cols[i - row_start]:
+                future_units.append(st.number_input(f"Semester {i + 1} Units:", min_value=1, value=18, step=1, key=f"goal_units_{i}"))
 
-    target_cgpa = st.number_input("🎯 Target CGPA:", min_value=0.0, max_value=5.0, value=4.5, step=0.01, format="%.2f")
+    target_cgpa = st.number_input("🎯 Target CGPA:", min_value=0.0, max_value=max_gpa, value=min(4.5, max_gpa), step=0.01, format="%.2f")
 
     if st.button("Calculate Required GPAs", type="primary", use_container_width=True):
-        total_future_credits = sem1_credits + sem2_credits
-        total_units_all = completed_credits + total_future_credits
-        total_points_needed = target_cgpa * total_units_all
-        points_remaining = total_points_needed - (current_cgpa * completed_credits)
-        equal_gpa = points_remaining / total_future_credits
-
-        sem1_lower = equal_gpa * 0.9
-        sem2_higher = (points_remaining - sem1_lower * sem1_credits) / sem2_credits
-        if sem2_higher > 5.0:
-            sem2_higher = 5.0
-            sem1_lower = (points_remaining - sem2_higher * sem2_credits) / sem1_credits
-
-        sem1_higher = equal_gpa * 1.1
-        sem2_lower = (points_remaining - sem1_higher * sem1_credits) / sem2_credits
-        if sem1_higher > 5.0:
-            sem1_higher = 5.0
-            sem2_lower = (points_remaining - sem1_higher * sem1_credits) / sem2_credits
+        log_event("plan_grades", "goal_planner")
+        result = plan_semesters(current_cgpa, completed_credits, target_cgpa, future_units, max_gpa)
+        average = result['required_average']
 
         st.markdown("---")
         st.markdown("### 📋 Your GPA Plans")
 
-        if equal_gpa > 5.0:
-            st.error("❌ This target is NOT achievable in 2 semesters")
-            st.warning(f"Even with perfect 5.0 GPA in both semesters, you would only reach {((current_cgpa * completed_credits) + (5.0 * total_future_credits)) / total_units_all:.2f} CGPA")
+        if not result['feasible']:
+            st.error(f"❌ This target is NOT achievable in {num_future} semester(s)")
+            st.warning(f"Even with a perfect {max_gpa:.1f} GPA in every semester, you would only reach {result['highest_cgpa']:.2f} CGPA")
+        elif result['already_secured']:
+            st.success(f"🎉 You've already secured this target — your CGPA can't fall below {result['lowest_cgpa']:.2f}")
         else:
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.markdown("**Option 1: Equal**")
-                st.metric("Sem 1", f"{equal_gpa:.2f}" if equal_gpa <= 5.0 else "Not Possible")
-                st.metric("Sem 2", f"{equal_gpa:.2f}" if equal_gpa <= 5.0 else "Not Possible")
-            with col2:
-                st.markdown("**Option 2: Start Lower**")
-                st.metric("Sem 1", f"{sem1_lower:.2f}" if sem1_lower <= 5.0 else "> 5.0 ❌")
-                st.metric("Sem 2", f"{sem2_higher:.2f}" if sem2_higher <= 5.0 else "> 5.0 ❌")
-            with col3:
-                st.markdown("**Option 3: Start Higher**")
-                st.metric("Sem 1", f"{sem1_higher:.2f}" if sem1_higher <= 5.0 else "> 5.0 ❌")
-                st.metric("Sem 2", f"{sem2_lower:.2f}" if sem2_lower <= 5.0 else "> 5.0 ❌")
+            shown = distinct_plans(result['plans'])
+            cols = st.columns(len(shown))
+            for col, name in zip(cols, shown):
+                title, caption = PLAN_LABELS[name]
+                with col:
+                    st.markdown(f"**{title}**")
+                    st.caption(caption)
+                    for i, gpa in enumerate(result['plans'][name]):
+                        st.metric(f"Sem {i + 1}", f"{gpa:.2f}")
 
             st.markdown("---")
-            if equal_gpa >= 4.8:
-                st.warning("⚠️ Extremely challenging: You need nearly all A's in both semesters")
-            elif equal_gpa >= 4.0:
+            if average >= 0.96 * max_gpa:
+                st.warning("⚠️ Extremely challenging: You need nearly all A's every semester")
+            elif average >= 0.8 * max_gpa:
                 st.info("💪 High performance needed: Mostly A's and some B's")
             else:
                 st.success("✅ Achievable with good performance")
 
+            if st.session_state.user_id:
+                show_target_probability(current_cgpa, completed_credits, target_cgpa, future_units, max_gpa)
+
+        with st.expander("📈 Compare other targets and course loads"):
+            targets = np.round(np.arange(max(target_cgpa - 0.5, 0.0), min(target_cgpa + 0.5, max_gpa) + 1e-9, 0.1), 2)
+            loads = np.arange(12, 25, 3)
+            sweep = scenario_sweep(current_cgpa, completed_credits, targets, np.repeat(loads[:, None], num_future, axis=1), max_gpa)
+            required = np.where(sweep['feasible'], np.clip(sweep['required'], 0.0, None), np.nan)
+            table = pd.DataFrame(required, index=[f"{t:.2f}" for t in targets], columns=[f"{u} units/sem" for u in loads])
+            table.index.name = "Target CGPA"
+            st.caption(f"Average GPA needed over {num_future} semester(s); blank means out of reach")
+            st.dataframe(
+                table, use_container_width=True,
+                column_config={column: st.column_config.NumberColumn(format="%.2f") for column in table.columns}
+            )
+
 
 # ==================== VIEW RECORDS ====================
 def view_records():
@@ -941,8 +1223,12 @@ def view_records():
         st.info("📚 You haven't saved any records yet. Add semesters to start tracking!")
         return
 
-    overall_cgpa = calculate_overall_cgpa(st.session_state.user_id)
-    total_units = sum([sem['total_units'] for sem in semesters])
+    courses_by_semester = get_courses_by_semester([sem['id'] for sem in semesters], st.session_state.user_id)
+    if not verify_user_totals(st.session_state.user_id, semesters, courses_by_semester):
+        st.toast("Your saved totals were out of date and have been recalculated.")
+    summary = get_cgpa_summary(st.session_state.user_id)
+    overall_cgpa = summary['cgpa']
+    total_units = summary['total_units']
 
     st.markdown("### 📊 Your Academic Summary")
     col1, col2, col3 = st.columns(3)
@@ -965,14 +1251,23 @@ def view_records():
         st.markdown(f"### 🎓 {year}")
         for sem in year_semesters:
             with st.expander(f"{sem['semester_name']} - GPA: {sem['gpa']:.3f} ({sem['total_units']} units)"):
-                courses = get_semester_courses(sem['id'])
-                for course in courses:
+                for course in courses_by_semester.get(sem['id'], []):
                     code = f"({course.get('course_code', '')})" if course.get('course_code') else ""
                     st.write(f"• **{course['course_name']}** {code} - Grade: {course['grade']}, Units: {course['units']}")
 
-    if st.button("📥 Export All Records", use_container_width=True):
-        report = generate_full_records_report(st.session_state.username, overall_cgpa, total_units, years)
-        st.download_button("Download Complete Records", report, f"records_{st.session_state.username}.txt", "text/plain")
+    # The export is only built once asked for, not on every visit to this page
+    if not st.session_state.get("records_export_open"):
+        if st.button("📥 Export All Records", use_container_width=True):
+            st.session_state.records_export_open = True
+            st.rerun()
+        return
+    st.markdown("#### 📥 Export All Records")
+    download_report(
+        "Download Complete Records", f"records_{st.session_state.username}",
+        lambda fmt: generate_full_records_report(st.session_state.username, overall_cgpa, total_units, semesters, courses_by_semester, fmt),
+        key="records_export", use_container_width=True,
+        on_click=log_event, args=("export_records", "records")
+    )
 
 
 # ==================== QUICK TUTORIAL ====================
@@ -983,13 +1278,13 @@ def quick_tutorial():
         1. Select **Single Semester GPA**
         2. Choose your grading scale (5.0 or 4.0)
         3. Enter each course code, grade, and units
-        4. Your GPA is calculated automatically!
+        4. Click **Calculate GPA** to see your result!
         """)
     with st.expander("📈 How to Calculate CGPA"):
         st.markdown("""
         1. Select **Multiple Semesters CGPA**
         2. Enter the number of semesters
-        3. For each semester, add all courses
+        3. For each semester, add all courses and click **Update Semester**
         4. Your overall CGPA is calculated!
         """)
     with st.expander("🎯 How to Use Goal Planning"):
@@ -1008,47 +1303,39 @@ def quick_tutorial():
         """)
 
 
+# ==================== REPORT CACHE ====================
+# Rendered report bytes are cached by st.cache_data, keyed on a hash of the builder's
+# arguments (courses, GPA, format, ...), so reruns reuse them and only changed inputs rebuild
+REPORT_CACHE_SIZE = 128
+REPORT_CACHE_TTL = 60 * 60
+
+
 # ==================== HELPER FUNCTIONS ====================
-def generate_report(year, semester, gpa, units, courses):
-    report = StringIO()
-    report.write("SEMESTER REPORT\n" + "="*50 + "\n\n")
-    report.write(f"Academic Year: {year}\nSemester: {semester}\nGPA: {gpa:.3f}\nTotal Units: {units}\n\n")
-    report.write("-"*50 + "\nCOURSES\n" + "-"*50 + "\n\n")
-    for course in courses:
-        code = f"({course.get('code', '')})" if course.get('code') else ""
-        report.write(f"{course['name']} {code}\nGrade: {course['grade']} | Units: {course['unit']} | GP: {course['point']}\n\n")
-    report.write("\n" + "="*50 + "\nGenerated by GPA/CGPA Calculator\nBuilt by Mathematics Students, University of Lagos (2024)\nDevelopers: Datapsalm & Victoria\nContact: datapsalm@gmail.com\n")
-    return report.getvalue()
-
-def generate_cgpa_report(semesters, cgpa, total_units):
-    report = StringIO()
-    report.write(f"CUMULATIVE GPA REPORT\n" + "="*60 + "\n\n")
-    report.write(f"Overall CGPA: {cgpa:.3f}\nTotal Units: {total_units}\nTotal Semesters: {len(semesters)}\n\n" + "="*60 + "\n\n")
-    for idx, sem in enumerate(semesters, 1):
-        report.write(f"SEMESTER {idx}: {sem['year']} {sem['name']}\n" + "-"*60 + "\n")
-        report.write(f"GPA: {sem['gpa']:.3f} | Units: {sem['units']}\n\n")
-        for course in sem['courses']:
-            code = f"({course.get('code', '')})" if course.get('code') else ""
-            report.write(f"  {course['name']} {code}\n  Grade: {course['grade']} | Units: {course['unit']}\n\n")
-        report.write("\n")
-    report.write("="*60 + "\nGenerated by GPA/CGPA Calculator\nBuilt by Mathematics Students, University of Lagos (2024)\nDevelopers: Datapsalm & Victoria\n")
-    return report.getvalue()
-
-def generate_full_records_report(username, cgpa, total_units, years):
-    report = StringIO()
-    report.write(f"COMPLETE ACADEMIC RECORDS\nStudent: {username}\n" + "="*60 + "\n\n")
-    report.write(f"Overall CGPA: {cgpa:.3f}\nTotal Units: {total_units}\n\n" + "="*60 + "\n\n")
-    for year, semesters in years.items():
-        report.write(f"ACADEMIC YEAR: {year}\n" + "-"*60 + "\n\n")
-        for sem in semesters:
-            report.write(f"{sem['semester_name']}\nGPA: {sem['gpa']:.3f} | Units: {sem['total_units']}\n\n")
-            courses = get_semester_courses(sem['id'])
-            for course in courses:
-                code = f"({course.get('course_code', '')})" if course.get('course_code') else ""
-                report.write(f"  {course['course_name']} {code}\n  Grade: {course['grade']} | Units: {course['units']}\n\n")
-            report.write("\n")
-    report.write("="*60 + "\nGenerated by GPA/CGPA Calculator\nBuilt by Mathematics Students, University of Lagos (2024)\n")
-    return report.getvalue()
+def download_report(label, filename, build, key, **button_args):
+    """Format picker and download button; build(fmt) returns the file contents"""
+    fmt = st.selectbox(
+        "Format", available_formats(), format_func=lambda f: EXPORT_FORMATS[f][0],
+        key=f"{key}_format", label_visibility="collapsed"
+    )
+    _, extension, mime = EXPORT_FORMATS[fmt]
+    st.download_button(label, build(fmt), f"{filename}.{extension}", mime, key=key, **button_args)
+
+@st.cache_data(max_entries=REPORT_CACHE_SIZE, ttl=REPORT_CACHE_TTL, show_spinner=False)
+def generate_report(year, semester, gpa, units, courses, fmt="txt"):
+    rows = calculator_rows([{"year": year, "name": semester, "gpa": gpa, "units": units, "courses": courses}])
+    summary = {"Academic Year": year, "Semester": semester, "GPA": f"{gpa:.3f}", "Total Units": units}
+    return export_bytes(fmt, rows, "SEMESTER REPORT", summary)
+
+@st.cache_data(max_entries=REPORT_CACHE_SIZE, ttl=REPORT_CACHE_TTL, show_spinner=False)
+def generate_cgpa_report(semesters, cgpa, total_units, fmt="txt"):
+    summary = {"Overall CGPA": f"{cgpa:.3f}", "Total Units": total_units, "Total Semesters": len(semesters)}
+    return export_bytes(fmt, calculator_rows(semesters), "CUMULATIVE GPA REPORT", summary)
+
+@st.cache_data(max_entries=REPORT_CACHE_SIZE, ttl=REPORT_CACHE_TTL, show_spinner=False)
+def generate_full_records_report(username, cgpa, total_units, semesters, courses_by_semester, fmt="txt"):
+    summary = {"Student": username, "Overall CGPA": f"{cgpa:.3f}", "Total Units": total_units}
+    rows = record_rows(semesters, courses_by_semester)
+    return export_bytes(fmt, rows, "COMPLETE ACADEMIC RECORDS", summary)
 
 def show_signup_inline():
     with st.expander("Create Free Account"):
@@ -1082,3 +1369,6 @@ if not st.session_state.logged_in:
         welcome_page()
 else:
     main_calculator()
+
+record_timing("full_rerun", time.perf_counter() - RUN_STARTED)
+show_timings()
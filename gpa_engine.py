@@ -0,0 +1,198 @@
+"""
+GPA/CGPA calculations used by the Streamlit app and the batch tools.
+Pure Python for single students, with NumPy versions for whole cohorts.
+"""
+
+import numpy as np
+
+GRADE_SCALES = {
+    "5.0 Scale": {'A': 5.0, 'B': 4.0, 'C': 3.0, 'D': 2.0, 'E': 1.0, 'F': 0.0},
+    "4.0 Scale": {'A': 4.0, 'B': 3.0, 'C': 2.0, 'D': 1.0, 'F': 0.0},
+}
+
+
+# ==================== SINGLE STUDENT ====================
+def semester_totals(courses):
+    """GPA, units and quality points for a list of course dicts with 'unit' and 'point' keys"""
+    total_units = sum(course['unit'] for course in courses)
+    total_points = sum(course['point'] * course['unit'] for course in courses)
+    gpa = total_points / total_units if total_units > 0 else 0.0
+    return {"gpa": gpa, "units": total_units, "points": total_points}
+
+
+def cumulative_totals(semesters):
+    """CGPA over semester dicts with 'units' and 'points' keys (as returned by semester_totals)"""
+    total_units = sum(sem['units'] for sem in semesters)
+    total_points = sum(sem['points'] for sem in semesters)
+    cgpa = total_points / total_units if total_units > 0 else 0.0
+    return {"cgpa": cgpa, "units": total_units, "points": total_points, "semesters": len(semesters)}
+
+
+# ==================== BATCH (NUMPY) ====================
+def grade_points_array(grades, grade_map):
+    """Map an array of letter grades to grade points in one pass"""
+    grades = np.asarray(grades)
+    letters, inverse = np.unique(grades, return_inverse=True)
+    unknown = [letter for letter in letters if letter not in grade_map]
+    if unknown:
+        raise ValueError(f"Unknown grade(s) for this scale: {', '.join(map(str, unknown))}")
+    lookup = np.array([grade_map[letter] for letter in letters], dtype=float)
+    return lookup[inverse].reshape(grades.shape)
+
+
+def grouped_gpa(group_ids, points, units, keep_order=False):
+    """GPA per group for flat, one-row-per-course arrays, e.g. group_ids = student or (student, semester) keys.
+    Groups come out sorted by id, or in order of first appearance with keep_order=True.
+    Returns (unique_ids, gpa, total_units, total_points)."""
+    unique_ids, first, index = np.unique(np.asarray(group_ids), return_index=True, return_inverse=True)
+    if keep_order:
+        order = np.argsort(first, kind="stable")
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        unique_ids, index = unique_ids[order], rank[index]
+    points = np.asarray(points, dtype=float)
+    units = np.asarray(units, dtype=float)
+    total_units = np.bincount(index, weights=units, minlength=len(unique_ids)).astype(float)
+    total_points = np.bincount(index, weights=points * units, minlength=len(unique_ids)).astype(float)
+    gpa = np.divide(total_points, total_units, out=np.zeros_like(total_points), where=total_units > 0)
+    return unique_ids, gpa, total_units, total_points
+
+
+# ==================== GOAL PLANNING ====================
+def scale_max(grade_map):
+    """Highest grade point on a scale, i.e. the best possible semester GPA"""
+    return max(grade_map.values())
+
+
+def required_average(current_cgpa, completed_units, target_cgpa, future_units):
+    """GPA needed on average over the future semesters to land exactly on the target"""
+    future_total = float(np.sum(future_units))
+    if future_total <= 0:
+        raise ValueError("Future semesters need at least one unit")
+    needed = target_cgpa * (completed_units + future_total) - current_cgpa * completed_units
+    return needed / future_total
+
+
+def reachable_range(current_cgpa, completed_units, future_units, max_gpa):
+    """Lowest and highest final CGPA possible (all 0.0 vs all max_gpa from here on)"""
+    future_total = float(np.sum(future_units))
+    total_units = completed_units + future_total
+    if total_units <= 0:
+        return 0.0, 0.0
+    earned = current_cgpa * completed_units
+    return earned / total_units, (earned + max_gpa * future_total) / total_units
+
+
+def _fill(units, points_needed, order, max_gpa):
+    """Exact LP vertex: give semesters max_gpa in the given order until the points are covered"""
+    gpas = np.zeros(len(units))
+    remaining = max(points_needed, 0.0)
+    for i in order:
+        if remaining <= 0:
+            break
+        gpas[i] = min(max_gpa, remaining / units[i])
+        remaining -= gpas[i] * units[i]
+    return gpas
+
+
+def plan_semesters(current_cgpa, completed_units, target_cgpa, future_units, max_gpa):
+    """Semester-by-semester GPA plans that reach the target CGPA.
+
+    Every plan meets sum(gpa * units) == points needed with 0 <= gpa <= max_gpa:
+      balanced      the same GPA every semester (lowest possible peak)
+      min_effort    fewest total GPA across semesters: lean on the heaviest
+                    semesters, where each GPA point is worth the most; among
+                    equal loads defer the work to the latest semesters
+      front_loaded  max out the earliest semesters so later ones can ease off
+    With equal loads every plan has the same total GPA, so min_effort differs
+    from front_loaded only through its tie-break; see distinct_plans.
+    Plans are None when the target is out of reach.
+    """
+    units = np.asarray(future_units, dtype=float)
+    average = required_average(current_cgpa, completed_units, target_cgpa, units)
+    lowest, highest = reachable_range(current_cgpa, completed_units, units, max_gpa)
+    feasible = average <= max_gpa + 1e-9
+    plans = {"balanced": None, "min_effort": None, "front_loaded": None}
+    if feasible:
+        points_needed = average * units.sum()
+        plans = {
+            "balanced": np.full(len(units), max(average, 0.0)),
+            # Heaviest first, later semesters first among equal loads
+            "min_effort": _fill(units, points_needed, np.lexsort((-np.arange(len(units)), -units)), max_gpa),
+            "front_loaded": _fill(units, points_needed, range(len(units)), max_gpa),
+        }
+    return {
+        "feasible": feasible,
+        "already_secured": average <= 0,
+        "required_average": average,
+        "lowest_cgpa": lowest,
+        "highest_cgpa": highest,
+        "plans": plans,
+    }
+
+
+def distinct_plans(plans):
+    """Plan names in order, skipping any plan with the same GPAs as one listed before it"""
+    kept = []
+    for name, gpas in plans.items():
+        if gpas is not None and not any(np.allclose(gpas, plans[other]) for other in kept):
+            kept.append(name)
+    return kept
+
+
+def scenario_sweep(current_cgpa, completed_units, targets, unit_scenarios, max_gpa):
+    """Required average GPA for every (target, unit distribution) pair in one pass.
+
+    targets is shape (T,); unit_scenarios is (S, N), one row per way of spreading
+    units over N future semesters (pad unused semesters with 0). Returns
+    required (T, S), feasible (T, S) and the best reachable CGPA per scenario (S,).
+    """
+    targets = np.asarray(targets, dtype=float)[:, None]
+    future_total = np.asarray(unit_scenarios, dtype=float).reshape(-1, np.shape(unit_scenarios)[-1]).sum(axis=1)
+    total_units = completed_units + future_total
+    earned = current_cgpa * completed_units
+    needed = targets * total_units - earned
+    required = np.divide(needed, future_total, out=np.full(needed.shape, np.inf), where=future_total > 0)
+    best = np.divide(earned + max_gpa * future_total, total_units,
+                     out=np.zeros_like(total_units), where=total_units > 0)
+    return {"required": required, "feasible": required <= max_gpa + 1e-9, "best_cgpa": best}
+
+
+# ==================== OUTCOME SIMULATION ====================
+def grade_distribution(grade_points):
+    """Distinct past grade points (as saved with each course) and how often each came up"""
+    grade_points = np.asarray(grade_points, dtype=float)
+    if grade_points.size == 0:
+        return np.array([]), np.array([])
+    points, counts = np.unique(grade_points, return_counts=True)
+    return points, counts / counts.sum()
+
+
+def simulate_final_cgpa(current_cgpa, completed_units, future_units, points, probs,
+                        course_units=3.0, n_sims=100_000, seed=None):
+    """Monte Carlo final CGPAs, one per simulated future.
+
+    Each future semester is split into equal-sized courses of about course_units
+    units, and every course grade is drawn independently from (points, probs).
+    Drawing per-semester grade counts from a multinomial keeps the work at
+    n_sims x grades per semester, however many courses that is.
+    """
+    rng = np.random.default_rng(seed)
+    points = np.asarray(points, dtype=float)
+    earned = np.full(n_sims, current_cgpa * completed_units, dtype=float)
+    total_units = completed_units + float(np.sum(future_units))
+    for units in future_units:
+        courses = max(1, int(round(units / course_units)))
+        counts = rng.multinomial(courses, probs, size=n_sims)
+        earned += (counts @ points) * (units / courses)
+    return earned / total_units if total_units > 0 else earned
+
+
+def target_probability(final_cgpas, target_cgpa):
+    """Share of simulated outcomes at or above the target, plus 10th/50th/90th percentiles"""
+    final_cgpas = np.asarray(final_cgpas)
+    p10, p50, p90 = np.percentile(final_cgpas, [10, 50, 90])
+    return {
+        "probability": float(np.mean(final_cgpas >= target_cgpa - 1e-9)),
+        "p10": float(p10), "median": float(p50), "p90": float(p90),
+    }
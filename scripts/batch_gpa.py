@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Batch GPA/CGPA calculator for whole cohorts exported as CSV.
+
+Input needs student_id, semester, grade and units columns, one row per course,
+with each student's rows kept together (the usual registrar export order).
+Output has one row per student per semester with the semester GPA and the
+student's running CGPA, written as soon as each chunk is done.
+
+    python scripts/batch_gpa.py cohort.csv -o results.csv --scale 5.0 --workers 4
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from gpa_engine import GRADE_SCALES, grade_points_array, grouped_gpa  # noqa: E402
+
+REQUIRED_COLUMNS = ("student_id", "semester", "grade", "units")
+KEY_SEPARATOR = "\x1f"
+OUTPUT_COLUMNS = ["student_id", "semester", "gpa", "units", "points", "cgpa", "cumulative_units"]
+
+
+def read_chunks(reader, chunk_rows):
+    """Yield column lists of roughly chunk_rows rows, never splitting one student across chunks.
+    Only the current chunk's students are remembered, so memory stays bounded by chunk_rows;
+    a student whose rows are split across chunks is not detected."""
+    seen = set()
+    chunk = {column: [] for column in REQUIRED_COLUMNS}
+    current = None
+    for row in reader:
+        student = row["student_id"]
+        if student != current:
+            if student in seen:
+                raise ValueError(f"Rows for student {student} are not contiguous; sort the file by student_id")
+            if current is not None and len(chunk["student_id"]) >= chunk_rows:
+                yield chunk
+                chunk = {column: [] for column in REQUIRED_COLUMNS}
+                seen.clear()
+            seen.add(student)
+            current = student
+        chunk["student_id"].append(student)
+        chunk["semester"].append(row["semester"])
+        chunk["grade"].append(row["grade"].strip().upper())
+        chunk["units"].append(row["units"])
+    if chunk["student_id"]:
+        yield chunk
+
+
+def process_chunk(chunk, scale):
+    """Semester GPA and running CGPA for every (student, semester) in a chunk"""
+    students = np.asarray(chunk["student_id"])
+    semesters = np.asarray(chunk["semester"])
+    points = grade_points_array(chunk["grade"], GRADE_SCALES[scale])
+    units = np.asarray(chunk["units"], dtype=float)
+
+    # Group by (student, semester) in order of first appearance
+    keys = np.char.add(np.char.add(students, KEY_SEPARATOR), semesters)
+    sem_keys, sem_gpa, sem_units, sem_points = grouped_gpa(keys, points, units, keep_order=True)
+    parts = np.char.partition(sem_keys, KEY_SEPARATOR)
+    sem_student, sem_label = parts[:, 0], parts[:, 2]
+
+    # Running totals restart at each student's first semester
+    cum_units = np.cumsum(sem_units)
+    cum_points = np.cumsum(sem_points)
+    starts = np.flatnonzero(np.r_[True, sem_student[1:] != sem_student[:-1]])
+    offset = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(sem_student)]))
+    base_units = np.r_[0.0, cum_units][starts][offset]
+    base_points = np.r_[0.0, cum_points][starts][offset]
+    cum_units -= base_units
+    cum_points -= base_points
+    cgpa = np.divide(cum_points, cum_units, out=np.zeros_like(cum_points), where=cum_units > 0)
+
+    rows = [
+        [student, label, f"{gpa:.3f}", f"{u:g}", f"{p:g}", f"{c:.3f}", f"{cu:g}"]
+        for student, label, gpa, u, p, c, cu
+        in zip(sem_student, sem_label, sem_gpa, sem_units, sem_points, cgpa, cum_units)
+    ]
+    return rows, len(students)
+
+
+def run(input_file, output_file, scale, workers, chunk_rows, progress=False):
+    reader = csv.DictReader(input_file)
+    missing = [column for column in REQUIRED_COLUMNS if column not in (reader.fieldnames or [])]
+    if missing:
+        raise ValueError(f"Missing column(s): {', '.join(missing)}")
+    writer = csv.writer(output_file)
+    writer.writerow(OUTPUT_COLUMNS)
+
+    started = time.perf_counter()
+    total_rows = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Keep at most two chunks per worker in flight so memory stays flat
+        pending = deque()
+        for chunk in read_chunks(reader, chunk_rows):
+            pending.append(pool.submit(process_chunk, chunk, scale))
+            if len(pending) >= workers * 2:
+                total_rows += write_result(pending.popleft(), writer, output_file)
+                if progress:
+                    report_throughput(total_rows, started)
+        while pending:
+            total_rows += write_result(pending.popleft(), writer, output_file)
+    elapsed = time.perf_counter() - started
+    return total_rows, elapsed
+
+
+def write_result(future, writer, output_file):
+    rows, course_rows = future.result()
+    writer.writerows(rows)
+    output_file.flush()
+    return course_rows
+
+
+def report_throughput(total_rows, started):
+    elapsed = time.perf_counter() - started
+    print(f"   {total_rows:,} rows ({total_rows / max(elapsed, 1e-9):,.0f} rows/sec)", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute semester GPA and CGPA for a cohort CSV")
+    parser.add_argument("input", help="CSV with student_id, semester, grade, units columns ('-' for stdin)")
+    parser.add_argument("-o", "--output", default="-", help="output CSV path (default: stdout)")
+    parser.add_argument("--scale", choices=["5.0", "4.0"], default="5.0", help="grading scale (default: 5.0)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--chunk-rows", type=int, default=20000, help="course rows per work unit")
+    parser.add_argument("--progress", action="store_true", help="print throughput while running")
+    args = parser.parse_args(argv)
+
+    input_file = sys.stdin if args.input == "-" else open(args.input, newline="", encoding="utf-8")
+    output_file = sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
+    try:
+        total_rows, elapsed = run(
+            input_file, output_file, f"{args.scale} Scale",
+            max(1, args.workers), max(1, args.chunk_rows), args.progress
+        )
+    except (ValueError, KeyError) as e:
+        print(f"❌ Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+
+    print(f"✅ Processed {total_rows:,} rows in {elapsed:.2f}s ({total_rows / max(elapsed, 1e-9):,.0f} rows/sec)", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
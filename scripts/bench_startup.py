@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Measure how long calc.py takes to render: the first run in a fresh process
+(imports, secrets, CSS, cached resources) and the warm reruns after it.
+
+    python scripts/bench_startup.py --reruns 20
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time cold start and warm reruns of the app")
+    parser.add_argument("--reruns", type=int, default=10, help="warm reruns to time")
+    parser.add_argument("--timeout", type=float, default=30, help="seconds allowed per run")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    import_time = time.perf_counter() - started
+
+    sys.path.insert(0, ROOT)
+    app = AppTest.from_file(os.path.join(ROOT, "calc.py"), default_timeout=args.timeout)
+
+    started = time.perf_counter()
+    app.run()
+    cold = time.perf_counter() - started
+    if app.exception:
+        print(f"❌ App raised: {app.exception[0].value}", file=sys.stderr)
+        sys.exit(1)
+
+    warm = []
+    for _ in range(max(1, args.reruns)):
+        started = time.perf_counter()
+        app.run()
+        warm.append(time.perf_counter() - started)
+
+    print(f"📦 streamlit import: {import_time * 1000:.0f} ms")
+    print(f"🧊 cold start:       {cold * 1000:.0f} ms")
+    print(f"🔥 warm rerun:       {statistics.median(warm) * 1000:.0f} ms median, {max(warm) * 1000:.0f} ms max ({len(warm)} runs)")
+
+
+if __name__ == '__main__':
+    main()
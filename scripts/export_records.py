@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Bulk export every user's saved records from Supabase.
+
+Users are read a page at a time (keyset-paginated on id); each page's
+semesters and courses come from one filtered request per table, and rows are
+streamed straight to the output file, so memory stays bounded by the page size.
+
+    SUPABASE_URL=... SUPABASE_KEY=... python scripts/export_records.py -o records.csv --format csv
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from transcript_export import EXPORT_COLUMNS, csv_chunks, jsonl_chunks, record_rows, text_chunks  # noqa: E402
+
+SUPABASE_URL = os.environ.get('SUPABASE_URL')
+SUPABASE_KEY = os.environ.get('SUPABASE_KEY')
+PAGE_SIZE = int(os.environ.get('EXPORT_PAGE_SIZE', 200))
+# Keep in.(...) filters well inside URL length limits
+IN_FILTER_SIZE = 200
+
+
+def get_rows(session, table, params):
+    response = session.get(f"{SUPABASE_URL}/rest/v1/{table}", params=params, timeout=60)
+    response.raise_for_status()
+    return response.json()
+
+
+def iter_user_pages(session, page_size=PAGE_SIZE):
+    """Yield lists of users with id > the previous page's last id"""
+    last_id = None
+    while True:
+        params = {"select": "id,username", "order": "id.asc", "limit": page_size}
+        if last_id is not None:
+            params["id"] = f"gt.{last_id}"
+        page = get_rows(session, "users", params)
+        # Only an empty page ends the scan; PostgREST's max-rows can cap pages below page_size
+        if not page:
+            return
+        yield page
+        last_id = page[-1]['id']
+
+
+def fetch_in(session, table, column, ids, select, page_size=PAGE_SIZE):
+    """Rows whose column is in ids, in id order. Each batch of IN_FILTER_SIZE ids is keyset-paginated
+    on id until an empty page, since its rows can outnumber PostgREST's max-rows."""
+    rows = []
+    for start in range(0, len(ids), IN_FILTER_SIZE):
+        batch = ids[start:start + IN_FILTER_SIZE]
+        last_id = None
+        while True:
+            params = {
+                column: f"in.({','.join(str(i) for i in batch)})",
+                "select": select,
+                "order": "id.asc",
+                "limit": page_size,
+            }
+            if last_id is not None:
+                params["id"] = f"gt.{last_id}"
+            page = get_rows(session, table, params)
+            if not page:
+                break
+            rows.extend(page)
+            last_id = page[-1]['id']
+    return rows
+
+
+def iter_all_rows(session, page_size=PAGE_SIZE):
+    """Record rows (one per course, or per semester without courses) for every user, tagged with user_id and username"""
+    for users in iter_user_pages(session, page_size):
+        semesters = fetch_in(
+            session, "semesters", "user_id", [user['id'] for user in users],
+            "id,user_id,academic_year,semester_name,gpa,total_units", page_size
+        )
+        # Same order the app shows them in
+        semesters.sort(key=lambda sem: (sem['academic_year'], sem['semester_name']))
+        courses = fetch_in(
+            session, "courses", "semester_id", [sem['id'] for sem in semesters],
+            "id,semester_id,course_name,course_code,grade,units,grade_point", page_size
+        )
+        courses_by_semester = {}
+        for course in courses:
+            courses_by_semester.setdefault(course['semester_id'], []).append(course)
+        semesters_by_user = {}
+        for sem in semesters:
+            semesters_by_user.setdefault(sem['user_id'], []).append(sem)
+        for user in users:
+            yield from record_rows(
+                semesters_by_user.get(user['id'], []), courses_by_semester,
+                user_id=user['id'], username=user['username']
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export all users' saved records")
+    parser.add_argument("-o", "--output", default="-", help="output path (default: stdout)")
+    parser.add_argument("--format", choices=["csv", "jsonl", "txt"], default="csv", help="output format (default: csv)")
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE, help="users fetched per page")
+    args = parser.parse_args()
+
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        print("❌ Error: SUPABASE_URL or SUPABASE_KEY not set", file=sys.stderr)
+        sys.exit(1)
+
+    session = requests.Session()
+    session.headers.update({"apikey": SUPABASE_KEY, "Content-Type": "application/json"})
+
+    counted = {"rows": 0}
+    def counting(rows):
+        for row in rows:
+            counted["rows"] += 1
+            yield row
+
+    rows = counting(iter_all_rows(session, max(1, args.page_size)))
+    if args.format == "csv":
+        chunks = csv_chunks(rows, ["user_id", "username"] + EXPORT_COLUMNS)
+    elif args.format == "jsonl":
+        chunks = jsonl_chunks(rows)
+    else:
+        chunks = text_chunks("ALL ACADEMIC RECORDS", {"Exported": time.strftime("%Y-%m-%d %H:%M UTC", time.gmtime())}, rows)
+
+    started = time.perf_counter()
+    output = sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
+    try:
+        for chunk in chunks:
+            output.write(chunk)
+    except requests.RequestException as e:
+        print(f"❌ Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    print(f"✅ Exported {counted['rows']:,} rows in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+In-process stand-in for the slice of PostgREST that calc.py and
+update_stats.py use, for load tests and local runs without a Supabase project.
+
+Supported: GET/HEAD/POST/PATCH/DELETE on /rest/v1/<table>; eq, neq, gt, gte,
+lt, lte, in and is filters; select=col,...; order=col.asc|desc,...;
+limit/offset and Range headers with Content-Range; Prefer return=minimal|
+representation and count=exact; unique usernames/emails (409 like Postgres);
+the user_cgpa_summary view, the user_totals table and POST
+/rest/v1/rpc/rebuild_user_totals, all computed from courses. Every request can be delayed by a configurable
+latency to mimic the network hop to Supabase.
+
+    python scripts/fake_postgrest.py --port 54321 --latency-ms 40 --jitter-ms 20
+    SUPABASE_URL=http://127.0.0.1:54321 SUPABASE_KEY=dev python scripts/update_stats.py
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlparse
+
+TABLES = ("users", "semesters", "courses", "usage_logs")
+UNIQUE = {"users": ("username", "email")}
+RESERVED_PARAMS = ("select", "order", "limit", "offset")
+
+
+def course_totals(tables, user_id=None):
+    """Per-user sum(grade_point * units), sum(units) and semester count, joining
+    courses to semesters like the SQL in supabase/migrations"""
+    totals = {}
+    owners = {}
+    for sem in tables["semesters"]:
+        if user_id is not None and sem["user_id"] != user_id:
+            continue
+        owners[sem["id"]] = sem["user_id"]
+        row = totals.setdefault(sem["user_id"], {
+            "user_id": sem["user_id"], "total_points": 0.0, "total_units": 0, "semester_count": 0
+        })
+        row["semester_count"] += 1
+    for course in tables["courses"]:
+        if course["semester_id"] in owners:
+            row = totals[owners[course["semester_id"]]]
+            row["total_points"] += course["grade_point"] * course["units"]
+            row["total_units"] += course["units"]
+    return totals
+
+
+def user_cgpa_summary(tables):
+    """Rows of the user_cgpa_summary view"""
+    rows = list(course_totals(tables).values())
+    for row in rows:
+        row["cgpa"] = row["total_points"] / row["total_units"] if row["total_units"] else 0.0
+    return rows
+
+
+def user_totals(tables):
+    """Rows of the user_totals table. Its triggers keep it equal to the raw rows in the
+    same transaction, so the stand-in derives it on read instead of storing it."""
+    updated_at = datetime.now(timezone.utc).isoformat()
+    return [{**row, "updated_at": updated_at} for row in course_totals(tables).values()]
+
+
+def rebuild_user_totals(tables, p_user_id):
+    """rpc/rebuild_user_totals: the user's recomputed user_totals row (zeros if they have none)"""
+    row = course_totals(tables, p_user_id).get(p_user_id) or {
+        "user_id": p_user_id, "total_points": 0.0, "total_units": 0, "semester_count": 0
+    }
+    return [{**row, "updated_at": datetime.now(timezone.utc).isoformat()}]
+
+
+# Relations computed from the tables on every read; PostgREST rejects writes to them here
+VIEWS = {"user_cgpa_summary": user_cgpa_summary, "user_totals": user_totals}
+RPCS = {"rebuild_user_totals": rebuild_user_totals}
+
+
+class UniqueViolation(Exception):
+    pass
+
+
+def _coerce(value, like):
+    """Convert a filter value from the query string to the type of the stored value"""
+    if value == "null":
+        return None
+    if isinstance(like, bool):
+        return value == "true"
+    if isinstance(like, int):
+        return int(value)
+    if isinstance(like, float):
+        return float(value)
+    return value
+
+
+def matches(row, column, expression):
+    op, _, raw = expression.partition(".")
+    value = row.get(column)
+    if op == "in":
+        options = [part.strip('"') for part in raw.strip("()").split(",") if part]
+        return value is not None and value in [_coerce(option, value) for option in options]
+    if op == "is":
+        return value is None if raw == "null" else value is (raw == "true")
+    if value is None:
+        return False
+    target = _coerce(raw, value)
+    if op == "eq":
+        return value == target
+    if op == "neq":
+        return value != target
+    if op == "gt":
+        return value > target
+    if op == "gte":
+        return value >= target
+    if op == "lt":
+        return value < target
+    if op == "lte":
+        return value <= target
+    raise ValueError(f"unsupported operator: {op}")
+
+
+class FakePostgREST:
+    """Tables, latency settings and request counters shared by all handler threads"""
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.tables = {name: [] for name in TABLES}
+        self.requests = Counter()
+        self._ids = Counter()
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._server = None
+
+    # ---------- data ----------
+    def insert(self, table, rows):
+        """Insert rows (enforcing UNIQUE columns) and return them with id/created_at filled in"""
+        with self._lock:
+            stored = self.tables[table]
+            for column in UNIQUE.get(table, ()):
+                seen = {row[column] for row in stored}
+                for row in rows:
+                    if row.get(column) in seen:
+                        raise UniqueViolation(f'duplicate key value violates unique constraint "{table}_{column}_key"')
+                    seen.add(row.get(column))
+            saved = []
+            for row in rows:
+                self._ids[table] += 1
+                saved.append({
+                    "id": self._ids[table],
+                    "created_at": datetime.now(timezone.utc).isoformat(),
+                    **row,
+                })
+            stored.extend(saved)
+            return [dict(row) for row in saved]
+
+    def select(self, table, filters):
+        with self._lock:
+            rows = VIEWS[table](self.tables) if table in VIEWS else self.tables[table]
+            return [dict(row) for row in rows if all(matches(row, column, expr) for column, expr in filters)]
+
+    def call(self, function, args):
+        with self._lock:
+            return RPCS[function](self.tables, **args)
+
+    def update(self, table, filters, values):
+        with self._lock:
+            changed = [row for row in self.tables[table] if all(matches(row, c, e) for c, e in filters)]
+            for row in changed:
+                row.update(values)
+            return [dict(row) for row in changed]
+
+    def delete(self, table, filters):
+        with self._lock:
+            keep, gone = [], []
+            for row in self.tables[table]:
+                (gone if all(matches(row, c, e) for c, e in filters) else keep).append(row)
+            self.tables[table] = keep
+            return gone
+
+    # ---------- server ----------
+    def delay(self):
+        seconds = (self.latency_ms + self._random.uniform(0, self.jitter_ms)) / 1000
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def count(self, method, table):
+        with self._lock:
+            self.requests[(method, table)] += 1
+
+    def start(self, host="127.0.0.1", port=0):
+        """Serve on a background thread; returns the base URL to use as SUPABASE_URL"""
+        handler = type("Handler", (PostgRESTHandler,), {"api": self})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f"http://{host}:{self._server.server_port}"
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+class PostgRESTHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    api = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, body=None, headers=None):
+        payload = b"" if body is None else json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(payload)
+
+    def send_error_json(self, status, code, message):
+        self.send_json(status, {"code": code, "details": None, "hint": None, "message": message})
+
+    def parse(self):
+        url = urlparse(self.path)
+        match = re.fullmatch(r"/rest/v1/([\w/]+)", url.path)
+        params = parse_qsl(url.query, keep_blank_values=True)
+        filters = [(key, value) for key, value in params if key not in RESERVED_PARAMS]
+        return (match.group(1) if match else None), dict(params), filters
+
+    def prefer(self):
+        return {
+            key.strip(): value.strip()
+            for key, _, value in (part.partition("=") for part in self.headers.get("Prefer", "").split(","))
+            if key.strip()
+        }
+
+    def read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"null")
+
+    def handle_request(self):
+        table, params, filters = self.parse()
+        self.api.count(self.command, table or self.path)
+        self.api.delay()
+        if table is not None and table.startswith("rpc/"):
+            self.handle_rpc(table[len("rpc/"):])
+            return
+        if table is None or (table not in self.api.tables and table not in VIEWS):
+            self.send_error_json(404, "42P01", f'relation "public.{table}" does not exist')
+            return
+        if table in VIEWS and self.command != "GET" and self.command != "HEAD":
+            self.send_error_json(405, "PGRST105", f'"{table}" is computed from the other tables and read-only here')
+            return
+        try:
+            if self.command in ("GET", "HEAD"):
+                self.handle_read(table, params, filters)
+            elif self.command == "POST":
+                body = self.read_body()
+                rows = body if isinstance(body, list) else [body]
+                self.send_written(201, self.api.insert(table, rows))
+            elif self.command == "PATCH":
+                self.send_written(200, self.api.update(table, filters, self.read_body()))
+            elif self.command == "DELETE":
+                self.send_written(200, self.api.delete(table, filters))
+        except UniqueViolation as e:
+            self.send_error_json(409, "23505", str(e))
+        except (ValueError, TypeError) as e:
+            self.send_error_json(400, "PGRST100", str(e))
+
+    def handle_rpc(self, function):
+        if function not in RPCS:
+            self.send_error_json(404, "PGRST202", f"Could not find the function public.{function}")
+            return
+        if self.command != "POST":
+            self.send_error_json(405, "PGRST101", "only POST is supported for this function")
+            return
+        try:
+            self.send_json(200, self.api.call(function, self.read_body() or {}))
+        except TypeError as e:
+            self.send_error_json(400, "PGRST100", str(e))
+
+    def handle_read(self, table, params, filters):
+        rows = self.api.select(table, filters)
+        for key in reversed([key for key in params.get("order", "").split(",") if key]):
+            column, _, direction = key.partition(".")
+            rows.sort(key=lambda row: (row.get(column) is None, row.get(column)), reverse=direction.startswith("desc"))
+        total = len(rows)
+        start = int(params.get("offset", 0))
+        end = start + int(params["limit"]) if "limit" in params else total
+        range_header = self.headers.get("Range")
+        if range_header:
+            first, _, last = range_header.partition("-")
+            start = max(start, int(first))
+            if last:
+                end = min(end, int(last) + 1)
+        rows = rows[start:end]
+        select = params.get("select", "*")
+        if select != "*":
+            columns = select.split(",")
+            rows = [{column: row.get(column) for column in columns} for row in rows]
+        shown = f"{start}-{start + len(rows) - 1}" if rows else "*"
+        counted = str(total) if self.prefer().get("count") == "exact" else "*"
+        status = 206 if range_header and len(rows) < total else 200
+        self.send_json(status, rows, {"Content-Range": f"{shown}/{counted}"})
+
+    def send_written(self, status, rows):
+        if self.prefer().get("return") == "representation":
+            self.send_json(status, rows)
+        else:
+            self.send_json(204 if status == 200 else status)
+
+    do_GET = do_HEAD = do_POST = do_PATCH = do_DELETE = handle_request
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local PostgREST stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--latency-ms", type=float, default=0, help="delay added to every request")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="extra random delay, uniform in [0, jitter]")
+    args = parser.parse_args()
+
+    api = FakePostgREST(args.latency_ms, args.jitter_ms)
+    url = api.start(args.host, args.port)
+    print(f"✅ Fake PostgREST listening on {url} (latency {args.latency_ms:.0f}+{args.jitter_ms:.0f} ms)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        api.stop()
+
+
+if __name__ == '__main__':
+    main()
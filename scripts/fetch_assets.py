@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Download the Poppins font and the page background into static/ so the app
+can serve them itself instead of pulling them from Google Fonts and Unsplash
+on every cold page load.
+
+The latin Poppins subsets already ship in static/fonts (SIL OFL, see
+OFL.txt); this refreshes them from Google Fonts. The background is not in the
+repo and is re-encoded as WebP at two widths (1600px for desktop, 800px for
+phones). Needs Pillow with WebP support (requirements-dev.txt).
+
+    python scripts/fetch_assets.py
+"""
+
+import io
+import os
+import re
+import sys
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATIC_DIR = os.path.join(ROOT, "static")
+FONT_WEIGHTS = (300, 400, 600, 700)
+FONT_CSS = "https://fonts.googleapis.com/css2?family=Poppins:wght@{weight}&display=swap"
+BACKGROUND = "https://images.unsplash.com/photo-1523050854058-8df90110c9f1?w=2000"
+BACKGROUND_WIDTHS = (1600, 800)
+# Google only hands out woff2 to browsers it recognises
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+
+
+def fetch_fonts(session):
+    """Save the latin subset of each Poppins weight as static/fonts/poppins-<weight>.woff2"""
+    font_dir = os.path.join(STATIC_DIR, "fonts")
+    os.makedirs(font_dir, exist_ok=True)
+    for weight in FONT_WEIGHTS:
+        css = session.get(FONT_CSS.format(weight=weight), timeout=30)
+        css.raise_for_status()
+        # The latin block is listed last in Google's CSS
+        urls = re.findall(r"url\((https://[^)]+\.woff2)\)", css.text)
+        if not urls:
+            raise ValueError(f"no woff2 source found for weight {weight}")
+        font = session.get(urls[-1], timeout=30)
+        font.raise_for_status()
+        path = os.path.join(font_dir, f"poppins-{weight}.woff2")
+        with open(path, "wb") as f:
+            f.write(font.content)
+        print(f"🔤 {os.path.relpath(path, ROOT)} ({len(font.content) / 1024:.0f} KB)")
+
+
+def fetch_background(session):
+    """Save the background as static/background-<width>.webp for each width"""
+    from PIL import Image
+
+    response = session.get(BACKGROUND, timeout=60)
+    response.raise_for_status()
+    image = Image.open(io.BytesIO(response.content)).convert("RGB")
+    for width in BACKGROUND_WIDTHS:
+        height = round(image.height * width / image.width)
+        path = os.path.join(STATIC_DIR, f"background-{width}.webp")
+        image.resize((width, height), Image.LANCZOS).save(path, "WEBP", quality=75, method=6)
+        print(f"🖼️ {os.path.relpath(path, ROOT)} ({os.path.getsize(path) / 1024:.0f} KB)")
+
+
+def main():
+    session = requests.Session()
+    session.headers["User-Agent"] = USER_AGENT
+    try:
+        fetch_fonts(session)
+        fetch_background(session)
+    except (requests.RequestException, ValueError, ImportError, OSError) as e:
+        print(f"❌ Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    print("✅ Assets saved to static/ - restart the app to pick them up")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Load-test calc.py against the in-process PostgREST stand-in.
+
+Each simulated user drives the real app script (through Streamlit's AppTest)
+from sign-up through login, saving semesters and opening My Records. A first
+single-user pass counts the database requests each page makes; then N users
+run concurrently and the time of every page render is reported as
+p50/p95/p99 along with total request counts.
+
+AppTest swaps a process-wide runtime in and out, so concurrent users each run
+in their own process. Process-wide caches (HTTP pool, user cache) are
+therefore per user here, which makes the request totals an upper bound.
+
+    python scripts/load_test.py --users 20 --semesters 3 --latency-ms 40 --jitter-ms 20
+"""
+
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(SCRIPTS_DIR)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, SCRIPTS_DIR)
+from fake_postgrest import FakePostgREST  # noqa: E402
+
+APP = os.path.join(ROOT, "calc.py")
+PAGES = ["landing", "signup", "login", "calculate", "save", "records"]
+GRADES = ["A", "B", "A", "C", "B"]
+# Sent in the background by the usage logger, so they can't be pinned on a page
+BACKGROUND_TABLES = ("usage_logs",)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class SimulatedUser:
+    """One browser session: a fresh AppTest whose page renders are timed"""
+
+    def __init__(self, name, url, timeout, on_page=None):
+        from streamlit.testing.v1 import AppTest
+
+        self.name = name
+        self.app = AppTest.from_file(APP, default_timeout=timeout)
+        self.app.secrets["SUPABASE_URL"] = url
+        self.app.secrets["SUPABASE_KEY"] = "load-test"
+        self.timings = defaultdict(list)
+        self.on_page = on_page
+
+    def render(self, page, element=None):
+        """Run the script (optionally by clicking element) and record how long the page took"""
+        started = time.perf_counter()
+        (element.click() if element is not None else self.app).run()
+        self.timings[page].append((time.perf_counter() - started) * 1000)
+        if self.app.exception:
+            raise RuntimeError(f"{self.name} on {page}: {self.app.exception[0].value}")
+        if self.on_page:
+            self.on_page(page)
+
+    def button(self, label):
+        return next(button for button in self.app.button if button.label == label)
+
+    def run(self, semesters):
+        app = self.app
+        self.render("landing")
+
+        app.text_input(key="signup_username").input(self.name)
+        app.text_input(key="signup_email").input(f"{self.name}@example.com")
+        app.text_input(key="signup_password").input("load-test")
+        app.text_input(key="signup_password_confirm").input("load-test")
+        self.render("signup", app.button(key="signup_btn"))
+
+        app.text_input(key="login_username").input(self.name)
+        app.text_input(key="login_password").input("load-test")
+        self.render("login", app.button(key="login_btn"))
+        if not app.session_state["user_id"]:
+            raise RuntimeError(f"{self.name} could not log in")
+
+        for idx in range(semesters):
+            year = f"{2020 + idx}/{2021 + idx}"
+            next(box for box in app.text_input if box.label == "Academic Year").input(year)
+            for course, grade in enumerate(GRADES, 1):
+                app.text_input(key=f"code_{course}").input(f"C{idx}{course:02d}")
+                app.selectbox(key=f"grade_{course}").select(grade)
+            self.render("calculate", self.button("🧮 Calculate GPA"))
+            self.render("save", self.button("💾 Save This Semester"))
+            app.radio(key="active_tool").set_value("📊 Calculate GPA/CGPA")
+
+        app.radio(key="active_tool").set_value("📚 My Records")
+        self.render("records")
+
+
+def page_request_counts(api, url, timeout, semesters):
+    """Requests per page for one user on its own, excluding background usage logging"""
+    def snapshot():
+        return Counter({key: n for key, n in api.requests.items() if key[1] not in BACKGROUND_TABLES})
+
+    counts = defaultdict(Counter)
+    renders = Counter()
+    last = snapshot()
+
+    def on_page(page):
+        nonlocal last
+        current = snapshot()
+        counts[page].update(current - last)
+        renders[page] += 1
+        last = current
+
+    SimulatedUser("calibration", url, timeout, on_page).run(semesters)
+    return counts, renders
+
+
+def run_user(name, url, timeout, semesters):
+    """Worker process entry point: one user's page timings"""
+    user = SimulatedUser(name, url, timeout)
+    user.run(semesters)
+    return dict(user.timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive concurrent simulated users through the app")
+    parser.add_argument("--users", type=int, default=10, help="concurrent simulated users")
+    parser.add_argument("--semesters", type=int, default=2, help="semesters each user saves")
+    parser.add_argument("--latency-ms", type=float, default=30, help="delay added to every database request")
+    parser.add_argument("--jitter-ms", type=float, default=10, help="extra random delay per request")
+    parser.add_argument("--timeout", type=float, default=60, help="seconds allowed per page render")
+    args = parser.parse_args()
+
+    api = FakePostgREST(args.latency_ms, args.jitter_ms, seed=0)
+    url = api.start()
+    print(f"🧪 Fake PostgREST on {url} (latency {args.latency_ms:.0f}+{args.jitter_ms:.0f} ms)")
+
+    timings = defaultdict(list)
+    errors = []
+    started = time.perf_counter()
+    spawn = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=max(1, args.users), mp_context=spawn) as pool:
+        futures = [
+            pool.submit(run_user, f"user{n:04d}", url, args.timeout, args.semesters)
+            for n in range(args.users)
+        ]
+        for future in as_completed(futures):
+            try:
+                for page, samples in future.result().items():
+                    timings[page].extend(samples)
+            except Exception as e:
+                errors.append(str(e))
+    elapsed = time.perf_counter() - started
+    load_requests = Counter(api.requests)
+
+    # Runs last: AppTest leaves the app registered as __main__, which would break spawning workers
+    try:
+        per_page, renders = page_request_counts(api, url, args.timeout, args.semesters)
+    except Exception as e:
+        print(f"❌ Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    print("\n📨 Database requests per page render (single user)")
+    for page in PAGES:
+        detail = ", ".join(
+            f"{method} {table} x{n / renders[page]:g}" for (method, table), n in sorted(per_page[page].items())
+        )
+        print(f"   {page:<10} {sum(per_page[page].values()) / max(renders[page], 1):>4g}  {detail}")
+
+    print(f"\n⏱️ Page render times, {args.users} concurrent users (ms)")
+    print(f"   {'page':<10} {'n':>5} {'p50':>8} {'p95':>8} {'p99':>8} {'mean':>8}")
+    for page in PAGES:
+        samples = timings[page]
+        if samples:
+            print(f"   {page:<10} {len(samples):>5} {percentile(samples, 50):>8.0f} {percentile(samples, 95):>8.0f} "
+                  f"{percentile(samples, 99):>8.0f} {statistics.mean(samples):>8.0f}")
+
+    total = sum(load_requests.values())
+    print(f"\n📨 {total:,} database requests in {elapsed:.1f}s ({total / max(elapsed, 1e-9):.1f}/s)")
+    for (method, table), n in load_requests.most_common():
+        print(f"   {method:<6} {table:<22} {n:>6}")
+
+    if errors:
+        print(f"\n❌ {len(errors)} user(s) failed, first: {errors[0]}", file=sys.stderr)
+        sys.exit(1)
+    print("\n✅ Done")
+
+
+if __name__ == '__main__':
+    main()
@@ -4,73 +4,214 @@ Update usage statistics from Supabase database
 This script is run by GitHub Actions daily to auto-commit stats
 """
 
+import argparse
+import json
 import os
 import sys
 import requests
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from collections import Counter
+from dateutil.parser import isoparse
 
 SUPABASE_URL = os.environ.get('SUPABASE_URL')
 SUPABASE_KEY = os.environ.get('SUPABASE_KEY')
+PAGE_SIZE = int(os.environ.get('STATS_PAGE_SIZE', 1000))
+# Ids this far below the high-water mark that haven't shown up yet are re-read on later runs:
+# usage logs are bulk-inserted from several processes, so a lower id can commit after a higher one
+GAP_WINDOW = int(os.environ.get('STATS_GAP_WINDOW', 5000))
+# Ids per in.(...) request, small enough to stay under PostgREST's max-rows and URL limits
+GAP_BATCH = 200
+STATE_FILE = 'stats_state.json'
+
+def iter_usage_logs(session, after_id=None, page_size=PAGE_SIZE):
+    """Yield usage_logs rows with id > after_id page by page, keyset-paginated on id"""
+    last_id = after_id
+    while True:
+        params = {
+            "select": "id,user_type,action,page,timestamp",
+            "order": "id.asc",
+            "limit": page_size
+        }
+        if last_id is not None:
+            params["id"] = f"gt.{last_id}"
+        response = session.get(f"{SUPABASE_URL}/rest/v1/usage_logs", params=params, timeout=30)
+        response.raise_for_status()
+        page = response.json()
+        # A short page isn't the end: PostgREST's max-rows can cap pages below page_size
+        if not page:
+            return
+        yield from page
+        last_id = page[-1]['id']
+
+def iter_usage_logs_by_id(session, ids, batch_size=GAP_BATCH):
+    """Yield the usage_logs rows that exist among ids, batch_size ids per request"""
+    ids = sorted(ids)
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start:start + batch_size]
+        params = {
+            "select": "id,user_type,action,page,timestamp",
+            "id": f"in.({','.join(str(log_id) for log_id in batch)})",
+            "order": "id.asc"
+        }
+        response = session.get(f"{SUPABASE_URL}/rest/v1/usage_logs", params=params, timeout=30)
+        response.raise_for_status()
+        yield from response.json()
+
+def count_usage_logs(session, filters=None):
+    """Exact number of usage_logs rows matching PostgREST filters, without downloading them"""
+    response = session.head(
+        f"{SUPABASE_URL}/rest/v1/usage_logs",
+        params=filters,
+        headers={"Prefer": "count=exact"},
+        timeout=30
+    )
+    response.raise_for_status()
+    # Content-Range looks like "0-24/268" or "*/268"
+    return int(response.headers["Content-Range"].rsplit("/", 1)[1])
+
+def parse_timestamp(value):
+    """Parse an ISO timestamp (with or without offset) to an aware UTC datetime, or None"""
+    if not value:
+        return None
+    try:
+        parsed = isoparse(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+def empty_state():
+    return {
+        'last_id': None,
+        'last_timestamp': None,
+        'gaps': [],
+        'total': 0,
+        'user_types': {},
+        'actions': {},
+        'pages': {},
+        'daily': {}
+    }
 
-def fetch_stats():
-    """Fetch usage stats from Supabase"""
+def load_state(path=STATE_FILE):
+    """Running aggregates and high-water mark from the previous run"""
+    if not os.path.exists(path):
+        return empty_state()
+    with open(path, encoding='utf-8') as f:
+        return {**empty_state(), **json.load(f)}
+
+def save_state(state, path=STATE_FILE):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp_path, path)
+
+class UsageAggregator:
+    """Every usage counter, updated in a single pass with each timestamp parsed once"""
+    
+    def __init__(self, state, gap_window=GAP_WINDOW):
+        self.last_id = state['last_id']
+        self.last_timestamp = state['last_timestamp']
+        # Ids at or below last_id (within gap_window) that haven't been counted yet
+        self.gaps = set(state['gaps'])
+        self.gap_window = gap_window
+        self.total = state['total']
+        self.user_types = Counter(state['user_types'])
+        self.actions = Counter(state['actions'])
+        self.pages = Counter(state['pages'])
+        self.daily = Counter(state['daily'])
+    
+    def add(self, log):
+        """Count a log once; returns False for an id that has already been counted"""
+        log_id = log['id']
+        if self.last_id is not None and log_id <= self.last_id:
+            if log_id not in self.gaps:
+                return False
+            self.gaps.discard(log_id)
+        else:
+            if self.last_id is not None:
+                self.gaps.update(range(max(self.last_id + 1, log_id - self.gap_window), log_id))
+            self.last_id = log_id
+        self.total += 1
+        self.user_types[log.get('user_type', 'unknown')] += 1
+        self.actions[log.get('action', 'unknown')] += 1
+        self.pages[log.get('page', 'unknown')] += 1
+        timestamp = parse_timestamp(log.get('timestamp'))
+        if timestamp is not None:
+            self.daily[timestamp.date().isoformat()] += 1
+            if log_id == self.last_id:
+                self.last_timestamp = timestamp.isoformat()
+        return True
+
+    def prune_gaps(self):
+        """Give up on ids that fell out of the window; they were rolled back or never used"""
+        if self.last_id is not None:
+            self.gaps = {log_id for log_id in self.gaps if log_id > self.last_id - self.gap_window}
+    
+    def last_days(self, days, today):
+        """Actions on the last `days` calendar days (UTC), today included"""
+        first_day = (today - timedelta(days=days - 1)).isoformat()
+        return sum(count for day, count in self.daily.items() if day >= first_day)
+    
+    def average_daily(self):
+        """Actions per day between the first and last day with any activity"""
+        if not self.daily:
+            return 0
+        first_day = datetime.fromisoformat(min(self.daily)).date()
+        last_day = datetime.fromisoformat(max(self.daily)).date()
+        return round(sum(self.daily.values()) / ((last_day - first_day).days + 1))
+    
+    def to_state(self):
+        return {
+            'last_id': self.last_id,
+            'last_timestamp': self.last_timestamp,
+            'gaps': sorted(self.gaps),
+            'total': self.total,
+            'user_types': dict(self.user_types),
+            'actions': dict(self.actions),
+            'pages': dict(self.pages),
+            'daily': dict(sorted(self.daily.items()))
+        }
+
+def fetch_stats(state):
+    """Fold new usage logs into the saved aggregates and return (stats, new state)"""
     if not SUPABASE_URL or not SUPABASE_KEY:
         print("❌ Error: SUPABASE_URL or SUPABASE_KEY not set")
         sys.exit(1)
     
-    headers = {
+    session = requests.Session()
+    session.headers.update({
         "apikey": SUPABASE_KEY,
         "Content-Type": "application/json"
-    }
+    })
     
     try:
-        # Get all usage logs
-        response = requests.get(
-            f"{SUPABASE_URL}/rest/v1/usage_logs?select=*&order=timestamp.desc",
-            headers=headers
-        )
-        response.raise_for_status()
-        logs = response.json()
-        
-        # Calculate statistics
-        total_actions = len(logs)
-        
-        # Count by user type
-        user_types = [l.get('user_type', 'unknown') for l in logs]
-        guest_actions = user_types.count('guest')
-        registered_actions = user_types.count('registered')
+        aggregator = UsageAggregator(state)
+        late_logs = sum(aggregator.add(log) for log in iter_usage_logs_by_id(session, aggregator.gaps))
+        new_logs = sum(aggregator.add(log) for log in iter_usage_logs(session, after_id=aggregator.last_id))
+        aggregator.prune_gaps()
+        print(f"   Folded in {format_number(new_logs)} new and {format_number(late_logs)} late log(s), "
+              f"now up to id {aggregator.last_id} ({len(aggregator.gaps)} id(s) still pending)")
         
-        # Last 7 days
-        week_ago = (datetime.now() - timedelta(days=7)).isoformat()
-        recent_logs = [l for l in logs if l.get('timestamp', '') > week_ago]
-        last_week = len(recent_logs)
+        table_total = count_usage_logs(session)
+        if table_total != aggregator.total:
+            print(f"⚠️  Stored total ({format_number(aggregator.total)}) differs from the table "
+                  f"({format_number(table_total)}); run with --rebuild to recount")
         
-        # Last 30 days
-        month_ago = (datetime.now() - timedelta(days=30)).isoformat()
-        monthly_logs = [l for l in logs if l.get('timestamp', '') > month_ago]
-        last_month = len(monthly_logs)
-        
-        # Most popular actions
-        actions = [l.get('action', 'unknown') for l in logs]
-        action_counts = Counter(actions)
-        top_actions = action_counts.most_common(3)
-        
-        # Most popular pages
-        pages = [l.get('page', 'unknown') for l in logs]
-        page_counts = Counter(pages)
-        top_pages = page_counts.most_common(3)
-        
-        return {
-            'total': total_actions,
-            'guest': guest_actions,
-            'registered': registered_actions,
-            'last_week': last_week,
-            'last_month': last_month,
-            'top_actions': top_actions,
-            'top_pages': top_pages,
-            'last_updated': datetime.now().strftime('%B %d, %Y at %H:%M UTC')
+        now = datetime.now(timezone.utc)
+        stats = {
+            'total': aggregator.total,
+            'guest': aggregator.user_types['guest'],
+            'registered': aggregator.user_types['registered'],
+            'last_week': aggregator.last_days(7, now.date()),
+            'last_month': aggregator.last_days(30, now.date()),
+            'average_daily': aggregator.average_daily(),
+            'top_actions': aggregator.actions.most_common(3),
+            'top_pages': aggregator.pages.most_common(3),
+            'last_updated': now.strftime('%B %d, %Y at %H:%M UTC')
         }
+        return stats, aggregator.to_state()
     
     except requests.exceptions.RequestException as e:
         print(f"❌ Error fetching from Supabase: {e}")
@@ -136,7 +277,7 @@ def update_stats_file(stats):
 
 ## 📈 Growth Insights
 
-- **Average daily usage:** {format_number(stats['total'] // max(1, (stats['total'] // 100)))} actions/day
+- **Average daily usage:** {format_number(stats['average_daily'])} actions/day
 - **Guest to Registered ratio:** {stats['guest']}:{stats['registered']}
 - **Engagement rate:** {((stats['registered'] / max(1, stats['total'])) * 100):.1f}% registered users
 
@@ -209,8 +350,14 @@ Try the calculator: [Your App URL Here]
         sys.exit(1)
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Update STATS.md from Supabase usage logs")
+    parser.add_argument('--rebuild', action='store_true', help=f"ignore {STATE_FILE} and recount from the first log")
+    args = parser.parse_args()
+    
+    state = empty_state() if args.rebuild else load_state()
     print("🔄 Fetching usage statistics from Supabase...")
-    stats = fetch_stats()
+    stats, state = fetch_stats(state)
     print("📝 Updating STATS.md...")
     update_stats_file(stats)
+    save_state(state)
     print("🎉 Done!")
@@ -0,0 +1,133 @@
+"""
+Process-wide helpers that calc.py shares across every session: the background
+usage-event logger and the per-user data cache.
+
+calc.py creates one of each through st.cache_resource. Nothing here imports
+Streamlit, so both can be used and tested outside a running app.
+"""
+
+import atexit
+import queue
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+
+# Put on the queue by close() so a flush thread waiting for events notices the stop at once
+_WAKE = object()
+
+
+# ==================== USAGE EVENT LOGGER ====================
+class UsageLogger:
+    """Buffers usage events in memory and writes them to usage_logs in bulk from a background thread.
+    log() never blocks: when the buffer is full because the backend is slow, events are dropped and counted."""
+
+    def __init__(self, session, url, batch_size, flush_interval, max_queue):
+        self.session = session
+        self.url = url
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        # Updated from every session's script thread and from the flush thread
+        self._stats_lock = threading.Lock()
+        self.stats = {"queued": 0, "sent": 0, "dropped_full": 0, "dropped_failed": 0, "batches": 0, "failed_batches": 0}
+        self._thread = threading.Thread(target=self._run, name="usage-logger", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _count(self, **increments):
+        with self._stats_lock:
+            for name, amount in increments.items():
+                self.stats[name] += amount
+
+    def snapshot(self):
+        """A consistent copy of the counters"""
+        with self._stats_lock:
+            return dict(self.stats)
+
+    def log(self, event):
+        try:
+            self._queue.put_nowait(event)
+            self._count(queued=1)
+        except queue.Full:
+            self._count(dropped_full=1)
+
+    def _run(self):
+        batch = []
+        deadline = None
+        while not (self._stop.is_set() and self._queue.empty()):
+            timeout = self.flush_interval if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                event = self._queue.get(timeout=timeout)
+                if event is not _WAKE:
+                    batch.append(event)
+                    if deadline is None:
+                        deadline = time.monotonic() + self.flush_interval
+            except queue.Empty:
+                pass
+            if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline or self._stop.is_set()):
+                self._flush(batch)
+                batch = []
+                deadline = None
+        if batch:
+            self._flush(batch)
+
+    def _flush(self, batch):
+        try:
+            response = self.session.post(self.url, json=batch, headers={"Prefer": "return=minimal"}, timeout=10)
+            response.raise_for_status()
+            self._count(batches=1, sent=len(batch))
+        except requests.exceptions.RequestException:
+            self._count(batches=1, failed_batches=1, dropped_failed=len(batch))
+
+    def close(self):
+        self._stop.set()
+        try:
+            self._queue.put_nowait(_WAKE)
+        except queue.Full:
+            pass  # the thread has work queued, so it isn't waiting
+        self._thread.join(timeout=self.flush_interval + 10)
+
+
+# ==================== USER DATA CACHE ====================
+class UserDataCache:
+    """Process-wide LRU of each user's semesters and courses, expiring after `ttl` seconds"""
+
+    def __init__(self, ttl, maxsize, clock=time.monotonic):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def get(self, user_id, field):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and self.clock() - entry["stored_at"] > self.ttl:
+                del self._entries[user_id]
+                entry = None
+            if entry is None or field not in entry:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.stats["hits"] += 1
+            return entry[field]
+
+    def set(self, user_id, field, value):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                entry = self._entries[user_id] = {"stored_at": self.clock()}
+            entry[field] = value
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def invalidate(self, user_id):
+        with self._lock:
+            if self._entries.pop(user_id, None) is not None:
+                self.stats["invalidations"] += 1
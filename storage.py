@@ -0,0 +1,242 @@
+"""
+Storage backends for user accounts, semesters and courses.
+
+calc.py talks to whichever backend is configured through the same small set
+of methods (see Storage). Rows go in and come out as plain dicts with the
+Supabase column names, so callers don't care where they live. SupabaseStorage
+goes through the app's supabase_request; SQLiteStorage is for self-hosted
+deployments that want local, network-free reads.
+"""
+
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+
+BACKENDS = ("supabase", "sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL UNIQUE,
+    email TEXT NOT NULL UNIQUE,
+    password_hash TEXT NOT NULL,
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS semesters (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    academic_year TEXT NOT NULL,
+    semester_name TEXT NOT NULL,
+    gpa REAL NOT NULL,
+    total_units INTEGER NOT NULL,
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS courses (
+    id INTEGER PRIMARY KEY,
+    semester_id INTEGER NOT NULL REFERENCES semesters(id) ON DELETE CASCADE,
+    course_name TEXT NOT NULL,
+    course_code TEXT,
+    grade TEXT NOT NULL,
+    units INTEGER NOT NULL,
+    grade_point REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS semesters_user_id_idx ON semesters (user_id, academic_year, semester_name);
+CREATE INDEX IF NOT EXISTS courses_semester_id_idx ON courses (semester_id, id);
+"""
+
+# Fixed SQL text so sqlite3's per-connection statement cache reuses the prepared statements
+INSERT_USER = "INSERT INTO users (username, email, password_hash) VALUES (?, ?, ?)"
+FIND_USER = "SELECT id, username, email FROM users WHERE username = ? AND password_hash = ?"
+INSERT_SEMESTER = (
+    "INSERT INTO semesters (user_id, academic_year, semester_name, gpa, total_units) "
+    "VALUES (:user_id, :academic_year, :semester_name, :gpa, :total_units) "
+    "RETURNING id, user_id, academic_year, semester_name, gpa, total_units, created_at"
+)
+INSERT_COURSE = (
+    "INSERT INTO courses (semester_id, course_name, course_code, grade, units, grade_point) "
+    "VALUES (:semester_id, :course_name, :course_code, :grade, :units, :grade_point)"
+)
+USER_SEMESTERS = (
+    "SELECT id, academic_year, semester_name, gpa, total_units, created_at FROM semesters "
+    "WHERE user_id = ? ORDER BY academic_year, semester_name"
+)
+SEMESTER_COURSES = (
+    "SELECT semester_id, course_name, course_code, grade, units, grade_point FROM courses "
+    "WHERE semester_id IN (SELECT value FROM json_each(?)) ORDER BY semester_id, id"
+)
+USER_TOTALS = (
+    "SELECT COALESCE(SUM(gpa * total_units), 0) AS total_points, "
+    "COALESCE(SUM(total_units), 0) AS total_units, COUNT(*) AS semester_count "
+    "FROM semesters WHERE user_id = ?"
+)
+
+
+class Storage(ABC):
+    """What calc.py needs from a backend. Methods return None when the backend
+    can't be reached, so callers can tell "no rows" from "no answer"."""
+
+    name = "none"
+
+    @abstractmethod
+    def add_user(self, username, email, password_hash):
+        """True if the account was created, False if the username/email is taken"""
+
+    @abstractmethod
+    def find_user(self, username, password_hash):
+        """{"id", "username", "email"} for matching credentials, else None"""
+
+    @abstractmethod
+    def add_semesters(self, rows):
+        """Insert semester rows; returns the saved rows (with ids) in input order"""
+
+    @abstractmethod
+    def add_courses(self, rows):
+        """Insert course rows; returns the rows that could not be saved"""
+
+    @abstractmethod
+    def semesters(self, user_id):
+        """A user's semester rows ordered by academic year and semester name"""
+
+    @abstractmethod
+    def courses(self, semester_ids):
+        """Courses of all given semesters, ordered by semester_id then insertion"""
+
+    @abstractmethod
+    def totals(self, user_id):
+        """({"total_points", "total_units", "semester_count"}, source) or None"""
+
+    def rebuild_totals(self, user_id):
+        """Recompute any stored per-user totals from the raw rows (no-op unless the backend stores them)"""
+
+
+class SupabaseStorage(Storage):
+    """Supabase REST (PostgREST). request is calc.py's supabase_request, which adds
+    the pooled session, per-rerun read cache and error reporting."""
+
+    name = "supabase"
+
+    def __init__(self, request):
+        self.request = request
+
+    def add_user(self, username, email, password_hash):
+        data = {"username": username, "email": email, "password_hash": password_hash}
+        return bool(self.request("POST", "users", data))
+
+    def find_user(self, username, password_hash):
+        params = {
+            "username": f"eq.{username}",
+            "password_hash": f"eq.{password_hash}",
+            "select": "id,username,email"
+        }
+        result = self.request("GET", "users", params=params)
+        return result[0] if result else None
+
+    def add_semesters(self, rows):
+        return self.request("POST", "semesters", rows)
+
+    def add_courses(self, rows):
+        if self.request("POST", "courses", rows, quiet=True) is not None:
+            return []
+        # PostgREST inserts an array atomically, so retry row by row to find the bad ones
+        return [row for row in rows if self.request("POST", "courses", row, quiet=True) is None]
+
+    def semesters(self, user_id):
+        params = {
+            "user_id": f"eq.{user_id}",
+            "select": "id,academic_year,semester_name,gpa,total_units,created_at",
+            "order": "academic_year,semester_name"
+        }
+        return self.request("GET", "semesters", params=params)
+
+    def courses(self, semester_ids):
+        params = {
+            "semester_id": f"in.({','.join(str(sem_id) for sem_id in semester_ids)})",
+            "select": "semester_id,course_name,course_code,grade,units,grade_point",
+            "order": "semester_id,id"
+        }
+        return self.request("GET", "courses", params=params)
+
+    def totals(self, user_id):
+        """The trigger-maintained user_totals row, else the user_cgpa_summary view, whichever is deployed"""
+        params = {
+            "user_id": f"eq.{user_id}",
+            "select": "total_points,total_units,semester_count"
+        }
+        for table, source in (("user_totals", "totals"), ("user_cgpa_summary", "view")):
+            result = self.request("GET", table, params=params, quiet=True)
+            if result is not None:
+                return (result[0] if result else {"total_points": 0.0, "total_units": 0, "semester_count": 0}), source
+        return None
+
+    def rebuild_totals(self, user_id):
+        self.request("POST", "rpc/rebuild_user_totals", {"p_user_id": user_id}, quiet=True)
+
+
+class SQLiteStorage(Storage):
+    """Local SQLite file in WAL mode. One connection is shared by every session and
+    rerun thread (calc.py creates the backend once per process), serialised by a lock;
+    its statement cache keeps the fixed SQL above prepared."""
+
+    name = "sqlite"
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=10, cached_statements=64, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        with self._conn:
+            self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params)]
+
+    def add_user(self, username, email, password_hash):
+        try:
+            with self._lock, self._conn:
+                self._conn.execute(INSERT_USER, (username, email, password_hash))
+            return True
+        except sqlite3.IntegrityError:
+            return False
+
+    def find_user(self, username, password_hash):
+        rows = self._query(FIND_USER, (username, password_hash))
+        return rows[0] if rows else None
+
+    def add_semesters(self, rows):
+        with self._lock, self._conn:
+            return [dict(self._conn.execute(INSERT_SEMESTER, row).fetchone()) for row in rows]
+
+    def add_courses(self, rows):
+        with self._lock:
+            try:
+                with self._conn:
+                    self._conn.executemany(INSERT_COURSE, rows)
+                return []
+            except sqlite3.Error:
+                # The batch rolled back as a whole; retry row by row to keep the good ones
+                failed = []
+                for row in rows:
+                    try:
+                        with self._conn:
+                            self._conn.execute(INSERT_COURSE, row)
+                    except sqlite3.Error:
+                        failed.append(row)
+                return failed
+
+    def semesters(self, user_id):
+        return self._query(USER_SEMESTERS, (user_id,))
+
+    def courses(self, semester_ids):
+        ids = "[" + ",".join(str(int(sem_id)) for sem_id in semester_ids) + "]"
+        return self._query(SEMESTER_COURSES, (ids,))
+
+    def totals(self, user_id):
+        return self._query(USER_TOTALS, (user_id,))[0], "sqlite"
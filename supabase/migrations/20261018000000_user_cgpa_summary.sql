@@ -0,0 +1,22 @@
+-- Per-user CGPA computed from the courses table, so the app can read one
+-- small row instead of downloading every semester and summing in Python.
+-- Query with: GET /rest/v1/user_cgpa_summary?user_id=eq.<id>
+
+create or replace view public.user_cgpa_summary
+with (security_invoker = on) as
+select
+    s.user_id,
+    coalesce(sum(c.grade_point * c.units), 0) as total_points,
+    coalesce(sum(c.units), 0) as total_units,
+    count(distinct s.id) as semester_count,
+    case
+        when coalesce(sum(c.units), 0) > 0
+            then sum(c.grade_point * c.units) / sum(c.units)
+        else 0
+    end as cgpa
+from public.semesters s
+left join public.courses c on c.semester_id = s.id
+group by s.user_id;
+
+create index if not exists semesters_user_id_idx on public.semesters (user_id);
+create index if not exists courses_semester_id_idx on public.courses (semester_id);
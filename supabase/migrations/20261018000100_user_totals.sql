@@ -0,0 +1,123 @@
+-- Running per-user totals, maintained by triggers in the same transaction as
+-- every semester/course insert, update and delete. The app reads this single
+-- row instead of aggregating history on each page load.
+-- Query with: GET /rest/v1/user_totals?user_id=eq.<id>
+-- Repair with: POST /rest/v1/rpc/rebuild_user_totals {"p_user_id": <id>}
+
+-- Seeding from the existing rows also gives user_id the same type as semesters.user_id
+create table if not exists public.user_totals as
+select
+    s.user_id,
+    coalesce(sum(c.grade_point * c.units), 0)::numeric as total_points,
+    coalesce(sum(c.units), 0)::bigint as total_units,
+    count(distinct s.id)::bigint as semester_count,
+    now() as updated_at
+from public.semesters s
+left join public.courses c on c.semester_id = s.id
+group by s.user_id;
+
+alter table public.user_totals add primary key (user_id);
+
+create or replace function public.bump_user_totals(
+    p_user_id public.semesters.user_id%TYPE,
+    p_points numeric,
+    p_units bigint,
+    p_semesters bigint
+) returns void
+language sql
+as $$
+    insert into public.user_totals (user_id, total_points, total_units, semester_count, updated_at)
+    values (p_user_id, p_points, p_units, p_semesters, now())
+    on conflict (user_id) do update set
+        total_points = user_totals.total_points + excluded.total_points,
+        total_units = user_totals.total_units + excluded.total_units,
+        semester_count = user_totals.semester_count + excluded.semester_count,
+        updated_at = now();
+$$;
+
+create or replace function public.user_totals_on_semester() returns trigger
+language plpgsql
+as $$
+begin
+    if tg_op = 'INSERT' then
+        perform public.bump_user_totals(new.user_id, 0, 0, 1);
+    elsif tg_op = 'DELETE' then
+        -- Runs before the cascade removes the courses, so take their share out here;
+        -- the course trigger skips rows whose semester is already gone.
+        perform public.bump_user_totals(
+            old.user_id,
+            -coalesce((select sum(grade_point * units) from public.courses where semester_id = old.id), 0),
+            -coalesce((select sum(units) from public.courses where semester_id = old.id), 0),
+            -1
+        );
+    elsif new.user_id is distinct from old.user_id then
+        perform public.rebuild_user_totals(old.user_id);
+        perform public.rebuild_user_totals(new.user_id);
+    end if;
+    return coalesce(new, old);
+end;
+$$;
+
+create or replace function public.user_totals_on_course() returns trigger
+language plpgsql
+as $$
+declare
+    owner public.semesters.user_id%TYPE;
+begin
+    if tg_op in ('DELETE', 'UPDATE') then
+        select user_id into owner from public.semesters where id = old.semester_id;
+        if found then
+            perform public.bump_user_totals(owner, -(old.grade_point * old.units), -old.units, 0);
+        end if;
+    end if;
+    if tg_op in ('INSERT', 'UPDATE') then
+        select user_id into owner from public.semesters where id = new.semester_id;
+        if found then
+            perform public.bump_user_totals(owner, new.grade_point * new.units, new.units, 0);
+        end if;
+    end if;
+    return coalesce(new, old);
+end;
+$$;
+
+create or replace function public.rebuild_user_totals(p_user_id public.semesters.user_id%TYPE)
+returns setof public.user_totals
+language sql
+as $$
+    insert into public.user_totals (user_id, total_points, total_units, semester_count, updated_at)
+    select
+        p_user_id,
+        coalesce(sum(c.grade_point * c.units), 0),
+        coalesce(sum(c.units), 0),
+        count(distinct s.id),
+        now()
+    from public.semesters s
+    left join public.courses c on c.semester_id = s.id
+    where s.user_id = p_user_id
+    on conflict (user_id) do update set
+        total_points = excluded.total_points,
+        total_units = excluded.total_units,
+        semester_count = excluded.semester_count,
+        updated_at = now()
+    returning *;
+$$;
+
+drop trigger if exists semesters_user_totals_ins on public.semesters;
+create trigger semesters_user_totals_ins
+    after insert on public.semesters
+    for each row execute function public.user_totals_on_semester();
+
+drop trigger if exists semesters_user_totals_upd on public.semesters;
+create trigger semesters_user_totals_upd
+    after update of user_id on public.semesters
+    for each row execute function public.user_totals_on_semester();
+
+drop trigger if exists semesters_user_totals_del on public.semesters;
+create trigger semesters_user_totals_del
+    before delete on public.semesters
+    for each row execute function public.user_totals_on_semester();
+
+drop trigger if exists courses_user_totals on public.courses;
+create trigger courses_user_totals
+    after insert or update or delete on public.courses
+    for each row execute function public.user_totals_on_course();
@@ -0,0 +1,60 @@
+import csv
+import io
+
+import pytest
+
+import batch_gpa
+
+
+def cohort_file(rows):
+    lines = ["student_id,semester,grade,units"] + [",".join(map(str, row)) for row in rows]
+    return io.StringIO("\n".join(lines) + "\n")
+
+
+def reader(rows):
+    return csv.DictReader(cohort_file(rows))
+
+
+COHORT = [
+    ("s1", "Y1S2", "A", 3), ("s1", "Y1S2", "C", 2), ("s1", "Y1S1", "B", 3),
+    ("s2", "Y1S1", "F", 3), ("s2", "Y1S1", "A", 3),
+    ("s3", "Y1S1", "B", 4), ("s3", "Y1S2", "A", 4),
+]
+
+
+def test_chunks_never_split_a_student():
+    chunks = list(batch_gpa.read_chunks(reader(COHORT), chunk_rows=2))
+    assert [sorted(set(chunk["student_id"])) for chunk in chunks] == [["s1"], ["s2"], ["s3"]]
+    assert sum(len(chunk["grade"]) for chunk in chunks) == len(COHORT)
+
+
+def test_non_contiguous_student_is_rejected():
+    rows = [("s1", "Y1S1", "A", 3), ("s2", "Y1S1", "B", 3), ("s1", "Y1S2", "C", 3)]
+    with pytest.raises(ValueError, match="s1"):
+        list(batch_gpa.read_chunks(reader(rows), chunk_rows=10))
+
+
+def test_running_cgpa_restarts_per_student_in_first_seen_semester_order():
+    chunk = next(batch_gpa.read_chunks(reader(COHORT), chunk_rows=100))
+    rows, course_rows = batch_gpa.process_chunk(chunk, "5.0 Scale")
+    assert course_rows == len(COHORT)
+    assert rows == [
+        ["s1", "Y1S2", "4.200", "5", "21", "4.200", "5"],
+        ["s1", "Y1S1", "4.000", "3", "12", "4.125", "8"],
+        ["s2", "Y1S1", "2.500", "6", "15", "2.500", "6"],
+        ["s3", "Y1S1", "4.000", "4", "16", "4.000", "4"],
+        ["s3", "Y1S2", "5.000", "4", "20", "4.500", "8"],
+    ]
+
+
+def test_output_order_is_kept_with_several_workers():
+    cohort = [(f"s{n:03d}", f"S{sem}", "ABCDF"[(n + sem) % 5], 3) for n in range(60) for sem in (1, 2)]
+    outputs = []
+    for workers in (1, 3):
+        output = io.StringIO()
+        total, _ = batch_gpa.run(cohort_file(cohort), output, "5.0 Scale", workers, chunk_rows=7)
+        assert total == len(cohort)
+        outputs.append(output.getvalue())
+    assert outputs[0] == outputs[1]
+    students = [line.split(",")[0] for line in outputs[1].splitlines()[1:]]
+    assert students == [row[0] for row in cohort]
@@ -0,0 +1,58 @@
+import export_records
+
+USERS = [{"id": n, "username": f"user{n}"} for n in range(1, 6)]
+SEMESTERS = [
+    {"id": 10 * user + n, "user_id": user, "academic_year": f"202{n}/202{n + 1}",
+     "semester_name": "First Semester", "gpa": 4.0, "total_units": 6}
+    for user in range(1, 6) for n in (2, 1, 3)
+]
+COURSES = [
+    {"id": 100 * sem["id"] + n, "semester_id": sem["id"], "course_name": f"C{sem['id']}-{n}",
+     "course_code": "", "grade": "A", "units": 3, "grade_point": 5.0}
+    for sem in SEMESTERS for n in range(2)
+]
+
+
+class CappedPostgREST:
+    """Serves users/semesters/courses like PostgREST with max-rows below every requested limit"""
+
+    def __init__(self, max_rows):
+        self.tables = {"users": USERS, "semesters": SEMESTERS, "courses": COURSES}
+        self.max_rows = max_rows
+
+    def get(self, url, params, timeout):
+        rows = self.tables[url.rsplit("/", 1)[1]]
+        for column, expression in params.items():
+            op, _, value = str(expression).partition(".")
+            if op == "in":
+                wanted = {int(v) for v in value.strip("()").split(",")}
+                rows = [row for row in rows if row[column] in wanted]
+            elif op == "gt":
+                rows = [row for row in rows if row[column] > int(value)]
+        rows = sorted(rows, key=lambda row: row["id"])[:min(params["limit"], self.max_rows)]
+        columns = params["select"].split(",")
+        return Response([{column: row[column] for column in columns} for row in rows])
+
+
+class Response:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.rows
+
+
+def test_capped_pages_do_not_drop_records():
+    rows = list(export_records.iter_all_rows(CappedPostgREST(max_rows=4), page_size=50))
+    assert len(rows) == len(COURSES)
+    assert {row["course_name"] for row in rows} == {course["course_name"] for course in COURSES}
+
+
+def test_each_user_gets_their_semesters_in_order():
+    rows = list(export_records.iter_all_rows(CappedPostgREST(max_rows=4), page_size=2))
+    first_user = [row for row in rows if row["username"] == "user1"]
+    assert [row["academic_year"] for row in first_user] == ["2021/2022"] * 2 + ["2022/2023"] * 2 + ["2023/2024"] * 2
+    assert [row["semester_no"] for row in first_user] == [1, 1, 2, 2, 3, 3]
@@ -0,0 +1,86 @@
+import pytest
+import requests
+
+from fake_postgrest import FakePostgREST
+
+
+@pytest.fixture
+def api():
+    api = FakePostgREST()
+    url = api.start()
+    api.rest = f"{url}/rest/v1"
+    yield api
+    api.stop()
+
+
+def seed(api):
+    ada, bob = api.insert("users", [
+        {"username": "ada", "email": "ada@example.com"}, {"username": "bob", "email": "bob@example.com"},
+    ])
+    first, second, empty = api.insert("semesters", [
+        {"user_id": ada["id"], "academic_year": "2023/2024", "semester_name": "First Semester", "gpa": 2.0, "total_units": 6},
+        {"user_id": ada["id"], "academic_year": "2023/2024", "semester_name": "Second Semester", "gpa": 3.0, "total_units": 3},
+        {"user_id": bob["id"], "academic_year": "2023/2024", "semester_name": "First Semester", "gpa": 0.0, "total_units": 0},
+    ])
+    api.insert("courses", [
+        {"semester_id": first["id"], "course_name": "MTH101", "grade": "A", "units": 3, "grade_point": 5.0},
+        {"semester_id": first["id"], "course_name": "PHY101", "grade": "B", "units": 3, "grade_point": 4.0},
+        {"semester_id": second["id"], "course_name": "CHM101", "grade": "C", "units": 3, "grade_point": 3.0},
+    ])
+    return ada, bob
+
+
+def test_filters_order_and_range(api):
+    seed(api)
+    rows = requests.get(f"{api.rest}/courses", params={
+        "units": "eq.3", "grade_point": "gte.4", "select": "course_name", "order": "grade_point.desc",
+    }).json()
+    assert rows == [{"course_name": "MTH101"}, {"course_name": "PHY101"}]
+    response = requests.get(f"{api.rest}/courses", params={"order": "id"},
+                            headers={"Range": "1-1", "Prefer": "count=exact"})
+    assert response.status_code == 206
+    assert response.headers["Content-Range"] == "1-1/3"
+    assert [row["course_name"] for row in response.json()] == ["PHY101"]
+    rows = requests.get(f"{api.rest}/semesters", params={"id": "in.(1,3)", "limit": 1, "order": "id.desc"}).json()
+    assert [row["id"] for row in rows] == [3]
+
+
+def test_duplicate_username_is_a_conflict(api):
+    seed(api)
+    response = requests.post(f"{api.rest}/users", json={"username": "ada", "email": "other@example.com"})
+    assert response.status_code == 409 and response.json()["code"] == "23505"
+
+
+def test_cgpa_view_sums_courses_not_semester_gpas(api):
+    ada, bob = seed(api)
+    rows = {row["user_id"]: row for row in requests.get(f"{api.rest}/user_cgpa_summary").json()}
+    # (5*3 + 4*3 + 3*3) / 9; the saved semester GPAs would give 21 / 9
+    assert rows[ada["id"]] == {"user_id": ada["id"], "total_points": 36.0, "total_units": 9,
+                               "semester_count": 2, "cgpa": 4.0}
+    assert rows[bob["id"]]["total_units"] == 0 and rows[bob["id"]]["cgpa"] == 0.0
+    api.tables["semesters"][1]["gpa"] = 1.0
+    rows = requests.get(f"{api.rest}/user_cgpa_summary", params={"user_id": f"eq.{ada['id']}"}).json()
+    assert rows[0]["total_points"] == 36.0
+
+
+def test_user_totals_follow_course_writes(api):
+    ada, _ = seed(api)
+    params = {"user_id": f"eq.{ada['id']}", "select": "total_points,total_units,semester_count"}
+    assert requests.get(f"{api.rest}/user_totals", params=params).json() == [
+        {"total_points": 36.0, "total_units": 9, "semester_count": 2}
+    ]
+    requests.delete(f"{api.rest}/courses", params={"course_name": "eq.CHM101"})
+    assert requests.get(f"{api.rest}/user_totals", params=params).json()[0]["total_units"] == 6
+    assert requests.post(f"{api.rest}/user_totals", json={"user_id": ada["id"]}).status_code == 405
+
+
+def test_rebuild_user_totals_returns_the_row(api):
+    ada, _ = seed(api)
+    response = requests.post(f"{api.rest}/rpc/rebuild_user_totals", json={"p_user_id": ada["id"]})
+    assert response.status_code == 200
+    (row,) = response.json()
+    assert (row["user_id"], row["total_points"], row["semester_count"]) == (ada["id"], 36.0, 2)
+    (row,) = requests.post(f"{api.rest}/rpc/rebuild_user_totals", json={"p_user_id": 99}).json()
+    assert row["total_units"] == 0 and row["semester_count"] == 0
+    assert requests.post(f"{api.rest}/rpc/missing", json={}).status_code == 404
+    assert api.requests[("POST", "rpc/rebuild_user_totals")] == 2
@@ -0,0 +1,148 @@
+import numpy as np
+import pytest
+
+from gpa_engine import (
+    GRADE_SCALES, cumulative_totals, distinct_plans, grade_distribution, grade_points_array, grouped_gpa,
+    plan_semesters, scale_max, semester_totals, simulate_final_cgpa, target_probability,
+)
+
+MAX_GPA = scale_max(GRADE_SCALES["5.0 Scale"])
+
+
+def test_semester_totals_weight_points_by_units():
+    totals = semester_totals([{"unit": 3, "point": 5.0}, {"unit": 2, "point": 3.0}])
+    assert totals == {"gpa": pytest.approx(4.2), "units": 5, "points": 21.0}
+    assert semester_totals([]) == {"gpa": 0.0, "units": 0, "points": 0}
+
+
+def test_cumulative_totals_sum_semesters():
+    overall = cumulative_totals([{"units": 5, "points": 21.0}, {"units": 3, "points": 9.0}])
+    assert overall == {"cgpa": pytest.approx(3.75), "units": 8, "points": 30.0, "semesters": 2}
+    assert cumulative_totals([])["cgpa"] == 0.0
+
+
+def test_grade_points_array_maps_letters():
+    points = grade_points_array(np.array([["A", "C"], ["F", "A"]]), GRADE_SCALES["5.0 Scale"])
+    np.testing.assert_array_equal(points, [[5.0, 3.0], [0.0, 5.0]])
+    assert grade_points_array(np.array([], dtype=str), GRADE_SCALES["5.0 Scale"]).shape == (0,)
+
+
+def test_grade_points_array_rejects_letters_off_the_scale():
+    with pytest.raises(ValueError, match="E"):
+        grade_points_array(["A", "E"], GRADE_SCALES["4.0 Scale"])
+
+
+def test_grouped_gpa_per_group():
+    ids, gpa, units, points = grouped_gpa(["s2", "s1", "s2", "s1"], [5.0, 4.0, 3.0, 0.0], [3, 2, 1, 0])
+    assert list(ids) == ["s1", "s2"]
+    np.testing.assert_allclose(gpa, [4.0, 4.5])
+    np.testing.assert_allclose(units, [2, 4])
+    np.testing.assert_allclose(points, [8.0, 18.0])
+
+
+def test_grouped_gpa_with_no_units_or_rows():
+    _, gpa, units, _ = grouped_gpa(["s1"], [5.0], [0])
+    np.testing.assert_array_equal(gpa, [0.0])
+    ids, gpa, _, _ = grouped_gpa(np.array([], dtype=str), [], [])
+    assert ids.size == 0 and gpa.size == 0
+
+
+def final_cgpa(current_cgpa, completed_units, gpas, units):
+    units = np.asarray(units, dtype=float)
+    return (current_cgpa * completed_units + np.dot(gpas, units)) / (completed_units + units.sum())
+
+
+@pytest.mark.parametrize("units", [[15, 15, 15], [12, 24, 18], [21]])
+def test_every_plan_lands_on_the_target_within_bounds(units):
+    result = plan_semesters(3.2, 60, 3.5, units, MAX_GPA)
+    assert result["feasible"] and not result["already_secured"]
+    for gpas in result["plans"].values():
+        assert final_cgpa(3.2, 60, gpas, units) == pytest.approx(3.5)
+        assert np.all(gpas >= 0) and np.all(gpas <= MAX_GPA + 1e-9)
+
+
+def test_balanced_plan_uses_the_required_average():
+    result = plan_semesters(3.0, 30, 3.5, [15, 15], MAX_GPA)
+    assert result["required_average"] == pytest.approx(4.0)
+    np.testing.assert_allclose(result["plans"]["balanced"], [4.0, 4.0])
+
+
+def test_min_effort_leans_on_the_heaviest_semester():
+    result = plan_semesters(3.0, 30, 3.5, [12, 24, 18], MAX_GPA)
+    min_effort = result["plans"]["min_effort"]
+    assert min_effort[1] == pytest.approx(MAX_GPA)
+    for gpas in result["plans"].values():
+        assert min_effort.sum() <= gpas.sum() + 1e-9
+
+
+def test_equal_loads_defer_min_effort_to_later_semesters():
+    plans = plan_semesters(3.0, 30, 3.5, [15, 15, 15], MAX_GPA)["plans"]
+    np.testing.assert_allclose(plans["front_loaded"], [5.0, 5.0, 1.5])
+    np.testing.assert_allclose(plans["min_effort"], [1.5, 5.0, 5.0])
+    assert distinct_plans(plans) == ["balanced", "min_effort", "front_loaded"]
+
+
+def test_duplicate_plans_are_hidden():
+    # One future semester leaves a single way to reach the target
+    plans = plan_semesters(3.0, 30, 3.5, [15], MAX_GPA)["plans"]
+    assert distinct_plans(plans) == ["balanced"]
+
+
+def test_unreachable_target_has_no_plans():
+    result = plan_semesters(2.0, 120, 4.5, [15], MAX_GPA)
+    assert not result["feasible"]
+    assert all(gpas is None for gpas in result["plans"].values())
+    assert distinct_plans(result["plans"]) == []
+    assert result["highest_cgpa"] < 4.5
+
+
+def test_secured_target_needs_nothing():
+    result = plan_semesters(4.8, 120, 3.0, [15, 15], MAX_GPA)
+    assert result["already_secured"]
+    assert result["lowest_cgpa"] >= 3.0
+    np.testing.assert_allclose(result["plans"]["min_effort"], [0.0, 0.0])
+
+
+def test_future_units_are_required():
+    with pytest.raises(ValueError):
+        plan_semesters(3.0, 30, 3.5, [0, 0], MAX_GPA)
+
+
+def test_grade_distribution_uses_stored_points():
+    # 4.5 isn't on either scale; it must be kept as saved, not remapped from a letter
+    points, probs = grade_distribution([5.0, 4.5, 5.0, 3.0])
+    np.testing.assert_allclose(points, [3.0, 4.5, 5.0])
+    np.testing.assert_allclose(probs, [0.25, 0.25, 0.5])
+    assert grade_distribution([])[0].size == 0
+
+
+def test_simulation_with_one_grade_is_deterministic():
+    final = simulate_final_cgpa(3.0, 30, [15, 15], [5.0], [1.0], n_sims=50, seed=1)
+    np.testing.assert_allclose(final, (3.0 * 30 + 5.0 * 30) / 60)
+
+
+def test_simulation_is_reproducible_and_bounded():
+    points, probs = grade_distribution([5.0, 4.0, 4.0, 2.0, 0.0])
+    first = simulate_final_cgpa(3.5, 45, [18, 21], points, probs, n_sims=2_000, seed=7)
+    second = simulate_final_cgpa(3.5, 45, [18, 21], points, probs, n_sims=2_000, seed=7)
+    np.testing.assert_array_equal(first, second)
+    lowest, highest = (3.5 * 45) / 84, (3.5 * 45 + 5.0 * 39) / 84
+    assert first.shape == (2_000,)
+    assert np.all(first >= lowest - 1e-9) and np.all(first <= highest + 1e-9)
+    expected = (3.5 * 45 + np.dot(points, probs) * 39) / 84
+    assert first.mean() == pytest.approx(expected, abs=0.02)
+
+
+def test_target_probability_summarises_outcomes():
+    outcome = target_probability(np.linspace(3.0, 4.0, 101), 3.5)
+    assert outcome["probability"] == pytest.approx(51 / 101)
+    assert outcome["median"] == pytest.approx(3.5)
+    assert outcome["p10"] == pytest.approx(3.1)
+    assert outcome["p90"] == pytest.approx(3.9)
+
+
+def test_grouped_gpa_can_keep_first_appearance_order():
+    ids, gpa, units, _ = grouped_gpa(["s2", "s1", "s2", "s3"], [5.0, 4.0, 3.0, 2.0], [1, 1, 1, 1], keep_order=True)
+    assert list(ids) == ["s2", "s1", "s3"]
+    np.testing.assert_allclose(gpa, [4.0, 4.0, 2.0])
+    np.testing.assert_allclose(units, [2, 1, 1])
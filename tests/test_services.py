@@ -0,0 +1,152 @@
+import threading
+import time
+
+import requests
+
+from services import UsageLogger, UserDataCache
+
+URL = "http://example.invalid/rest/v1/usage_logs"
+
+
+class RecordingSession:
+    """Collects posted batches; optionally holds every post until released, or fails them"""
+
+    def __init__(self, hold=False, fail=False):
+        self.batches = []
+        self.posted = threading.Event()
+        self.release = threading.Event()
+        self.fail = fail
+        if not hold:
+            self.release.set()
+
+    def post(self, url, json, headers, timeout):
+        self.posted.set()
+        self.release.wait(5)
+        if self.fail:
+            raise requests.exceptions.ConnectionError("backend down")
+        self.batches.append(list(json))
+        return OkResponse()
+
+
+class OkResponse:
+    def raise_for_status(self):
+        pass
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        time.sleep(0.01)
+
+
+def test_full_batches_flush_without_waiting_for_the_interval():
+    session = RecordingSession()
+    logger = UsageLogger(session, URL, batch_size=3, flush_interval=60, max_queue=100)
+    for n in range(3):
+        logger.log({"n": n})
+    wait_for(lambda: session.batches)
+    assert session.batches == [[{"n": 0}, {"n": 1}, {"n": 2}]]
+    logger.close()
+
+
+def test_partial_batches_flush_after_the_interval():
+    session = RecordingSession()
+    logger = UsageLogger(session, URL, batch_size=100, flush_interval=0.05, max_queue=100)
+    logger.log({"n": 0})
+    logger.log({"n": 1})
+    wait_for(lambda: session.batches)
+    assert session.batches == [[{"n": 0}, {"n": 1}]]
+    assert logger.snapshot()["sent"] == 2
+    logger.close()
+
+
+def test_events_are_dropped_and_counted_when_the_buffer_is_full():
+    session = RecordingSession(hold=True)
+    logger = UsageLogger(session, URL, batch_size=1, flush_interval=60, max_queue=2)
+    logger.log({"n": 0})
+    session.posted.wait(5)
+    # The flush thread is stuck posting event 0, so only two more fit
+    for n in range(1, 6):
+        logger.log({"n": n})
+    assert logger.snapshot()["dropped_full"] == 3
+    session.release.set()
+    logger.close()
+    stats = logger.snapshot()
+    assert stats["queued"] == 3 and stats["sent"] == 3
+    assert [event for batch in session.batches for event in batch] == [{"n": 0}, {"n": 1}, {"n": 2}]
+
+
+def test_failed_batches_are_counted_as_dropped():
+    logger = UsageLogger(RecordingSession(fail=True), URL, batch_size=2, flush_interval=60, max_queue=10)
+    logger.log({"n": 0})
+    logger.log({"n": 1})
+    wait_for(lambda: logger.snapshot()["failed_batches"] == 1)
+    assert logger.snapshot()["dropped_failed"] == 2
+    logger.close()
+
+
+def test_counters_survive_concurrent_logging():
+    logger = UsageLogger(RecordingSession(), URL, batch_size=50, flush_interval=0.01, max_queue=100_000)
+    threads = [threading.Thread(target=lambda: [logger.log({}) for _ in range(2_000)]) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    logger.close()
+    stats = logger.snapshot()
+    assert stats["queued"] == stats["sent"] == 16_000
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_user_cache_expires_after_ttl():
+    clock = FakeClock()
+    cache = UserDataCache(ttl=60, maxsize=10, clock=clock)
+    cache.set(1, "semesters", ["fall"])
+    clock.now += 60
+    assert cache.get(1, "semesters") == ["fall"]
+    clock.now += 1
+    assert cache.get(1, "semesters") is None
+    assert cache.stats["hits"] == 1 and cache.stats["misses"] == 1
+
+
+def test_user_cache_ttl_runs_from_first_store():
+    clock = FakeClock()
+    cache = UserDataCache(ttl=60, maxsize=10, clock=clock)
+    cache.set(1, "semesters", ["fall"])
+    clock.now += 50
+    cache.set(1, "courses", {1: []})
+    clock.now += 20
+    # Both fields were built from the same read, so they expire together
+    assert cache.get(1, "courses") is None
+
+
+def test_user_cache_evicts_least_recently_used_user():
+    cache = UserDataCache(ttl=60, maxsize=2, clock=FakeClock())
+    cache.set(1, "semesters", "a")
+    cache.set(2, "semesters", "b")
+    assert cache.get(1, "semesters") == "a"
+    cache.set(3, "semesters", "c")
+    assert cache.get(2, "semesters") is None
+    assert cache.get(1, "semesters") == "a" and cache.get(3, "semesters") == "c"
+    assert cache.stats["evictions"] == 1
+
+
+def test_user_cache_invalidation_drops_every_field():
+    cache = UserDataCache(ttl=60, maxsize=10, clock=FakeClock())
+    cache.set(1, "semesters", "a")
+    cache.set(1, "summary", {"cgpa": 4.0})
+    cache.set(2, "semesters", "b")
+    cache.invalidate(1)
+    cache.invalidate(99)
+    assert cache.get(1, "semesters") is None and cache.get(1, "summary") is None
+    assert cache.get(2, "semesters") == "b"
+    assert cache.stats["invalidations"] == 1
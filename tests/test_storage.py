@@ -0,0 +1,117 @@
+import sqlite3
+import threading
+
+import pytest
+
+from storage import SQLiteStorage, Storage, SupabaseStorage
+
+
+@pytest.fixture
+def store(tmp_path):
+    backend = SQLiteStorage(str(tmp_path / "test.db"))
+    yield backend
+    backend.close()
+
+
+def save_semester(store, user_id=1, year="2024/2025", name="First Semester", gpa=4.5, units=6):
+    return store.add_semesters([{
+        "user_id": user_id, "academic_year": year, "semester_name": name, "gpa": gpa, "total_units": units
+    }])[0]
+
+
+def course(semester_id, code, grade="A", units=3, point=5.0):
+    return {"semester_id": semester_id, "course_name": code, "course_code": code,
+            "grade": grade, "units": units, "grade_point": point}
+
+
+def test_incomplete_backend_fails_on_creation():
+    class Partial(Storage):
+        def add_user(self, username, email, password_hash):
+            return True
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_users_are_unique_and_found_by_hash(store):
+    assert store.add_user("ada", "ada@example.com", "h1")
+    assert not store.add_user("ada", "other@example.com", "h2")
+    assert not store.add_user("bob", "ada@example.com", "h3")
+    assert store.find_user("ada", "h1") == {"id": 1, "username": "ada", "email": "ada@example.com"}
+    assert store.find_user("ada", "wrong") is None
+
+
+def test_semesters_and_courses_round_trip(store):
+    store.add_user("ada", "ada@example.com", "h")
+    second = save_semester(store, year="2025/2026", gpa=4.0)
+    first = save_semester(store, year="2024/2025", gpa=5.0)
+    assert store.add_courses([course(first["id"], "MAT101"), course(second["id"], "MAT201", "B", 3, 4.0)]) == []
+
+    assert [sem["academic_year"] for sem in store.semesters(1)] == ["2024/2025", "2025/2026"]
+    assert [c["course_code"] for c in store.courses([second["id"], first["id"]])] == ["MAT201", "MAT101"]
+    totals, source = store.totals(1)
+    assert source == "sqlite"
+    assert totals == {"total_points": 54.0, "total_units": 12, "semester_count": 2}
+
+
+def test_bad_course_rows_are_reported_and_good_ones_kept(store):
+    store.add_user("ada", "ada@example.com", "h")
+    sem = save_semester(store)
+    failed = store.add_courses([course(sem["id"], "GOOD"), course(999, "ORPHAN")])
+    assert [row["course_code"] for row in failed] == ["ORPHAN"]
+    assert [c["course_code"] for c in store.courses([sem["id"]])] == ["GOOD"]
+
+
+def test_totals_for_user_without_semesters(store):
+    assert store.totals(42) == ({"total_points": 0, "total_units": 0, "semester_count": 0}, "sqlite")
+
+
+def test_one_connection_shared_across_threads(store, monkeypatch):
+    connects = []
+    monkeypatch.setattr(sqlite3, "connect", lambda *a, **k: connects.append(a))
+    store.add_user("ada", "ada@example.com", "h")
+    errors = []
+
+    def read():
+        try:
+            for _ in range(50):
+                assert store.find_user("ada", "h")["username"] == "ada"
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=read) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert connects == []
+
+
+def test_wal_mode(store):
+    assert store._conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_supabase_backend_retries_courses_row_by_row():
+    calls = []
+
+    def request(method, endpoint, data=None, params=None, quiet=False):
+        calls.append((method, endpoint, data))
+        if isinstance(data, list):
+            return None
+        return None if data["course_code"] == "BAD" else [data]
+
+    backend = SupabaseStorage(request)
+    failed = backend.add_courses([course(1, "OK"), course(1, "BAD")])
+    assert [row["course_code"] for row in failed] == ["BAD"]
+    assert len(calls) == 3
+
+
+def test_supabase_totals_fall_back_to_view():
+    def request(method, endpoint, data=None, params=None, quiet=False):
+        if endpoint == "user_totals":
+            return None
+        return [{"total_points": 27.0, "total_units": 6, "semester_count": 1}]
+
+    row, source = SupabaseStorage(request).totals(1)
+    assert source == "view" and row["total_units"] == 6
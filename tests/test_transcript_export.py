@@ -0,0 +1,116 @@
+import csv
+import io
+import json
+
+import pytest
+
+import transcript_export
+from transcript_export import (
+    EXPORT_COLUMNS, available_formats, calculator_rows, csv_chunks, export_bytes, record_rows, text_chunks,
+)
+
+SEMESTERS = [
+    {"id": 1, "academic_year": "2023/2024", "semester_name": "First Semester", "gpa": 4.25, "total_units": 6},
+    {"id": 2, "academic_year": "2023/2024", "semester_name": "Second Semester", "gpa": 0.0, "total_units": 0},
+]
+COURSES = {1: [
+    {"course_name": "MTH101", "course_code": "MTH101", "grade": "A", "units": 3, "grade_point": 5.0},
+    {"course_name": "Physics", "course_code": None, "grade": "C", "units": 3, "grade_point": 3.0},
+]}
+
+
+def test_record_rows_flatten_courses_and_tag_extras():
+    rows = list(record_rows(SEMESTERS[:1], COURSES, username="ada"))
+    assert [row["course_name"] for row in rows] == ["MTH101", "Physics"]
+    assert rows[1]["course_code"] == ""
+    assert all(row["username"] == "ada" and row["semester_gpa"] == 4.25 for row in rows)
+
+
+def test_semester_without_courses_is_kept():
+    rows = list(record_rows(SEMESTERS, COURSES))
+    assert len(rows) == 3
+    assert rows[-1]["semester"] == "Second Semester"
+    assert rows[-1]["course_name"] is None and rows[-1]["grade"] is None
+
+
+def test_csv_has_header_and_one_line_per_row():
+    data = export_bytes("csv", record_rows(SEMESTERS, COURSES)).decode("utf-8")
+    parsed = list(csv.DictReader(io.StringIO(data)))
+    assert list(parsed[0]) == EXPORT_COLUMNS
+    assert [row["course_name"] for row in parsed] == ["MTH101", "Physics", ""]
+
+
+def test_csv_is_flushed_in_chunks(monkeypatch):
+    monkeypatch.setattr(transcript_export, "CHUNK_SIZE", 100)
+    rows = list(record_rows(SEMESTERS, COURSES)) * 20
+    chunks = list(csv_chunks(rows))
+    assert len(chunks) > 1
+    assert len("".join(chunks).splitlines()) == len(rows) + 1
+
+
+def test_jsonl_round_trips():
+    data = export_bytes("jsonl", record_rows(SEMESTERS, COURSES)).decode("utf-8")
+    assert [json.loads(line) for line in data.splitlines()] == list(record_rows(SEMESTERS, COURSES))
+
+
+def test_text_report_groups_by_semester():
+    text = "".join(text_chunks("RECORDS", {"Student": "ada"}, record_rows(SEMESTERS, COURSES)))
+    assert text.startswith("RECORDS\n")
+    assert "Student: ada" in text
+    assert text.count("2023/2024 First Semester") == 1
+    assert "MTH101 (MTH101)" in text and "  Physics\n" in text
+    assert "2023/2024 Second Semester" in text and "No courses saved" in text
+    assert text.rstrip().endswith(transcript_export.FOOTER[-1])
+
+
+def test_calculator_rows_match_record_columns():
+    rows = list(calculator_rows([{
+        "year": "2024/2025", "name": "First Semester", "gpa": 4.0, "units": 3,
+        "courses": [{"name": "CHM101", "code": "", "grade": "B", "unit": 3, "point": 4.0}],
+    }]))
+    assert list(rows[0]) == EXPORT_COLUMNS
+    assert rows[0]["units"] == 3 and rows[0]["grade_point"] == 4.0
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError):
+        export_bytes("xml", [])
+
+
+def test_pdf_is_offered_only_with_reportlab(monkeypatch):
+    monkeypatch.setattr(transcript_export, "pdf_available", lambda: False)
+    assert available_formats() == ["txt", "csv", "jsonl"]
+    monkeypatch.setattr(transcript_export, "pdf_available", lambda: True)
+    assert "pdf" in available_formats()
+
+
+def test_semesters_with_the_same_label_stay_separate():
+    # The CGPA page starts every semester as an empty year and "First Semester"
+    semesters = [
+        {"year": "", "name": "First Semester", "gpa": gpa, "units": 3,
+         "courses": [{"name": name, "code": "", "grade": grade, "unit": 3, "point": point}]}
+        for gpa, name, grade, point in ((5.0, "MTH101", "A", 5.0), (3.0, "PHY101", "C", 3.0))
+    ]
+    text = export_bytes("txt", calculator_rows(semesters), "CUMULATIVE GPA REPORT").decode("utf-8")
+    assert "SEMESTER 1:  First Semester" in text and "SEMESTER 2:  First Semester" in text
+    assert text.index("GPA: 3.000") < text.index("PHY101")
+    assert text.index("MTH101") < text.index("SEMESTER 2")
+    parsed = list(csv.DictReader(io.StringIO(export_bytes("csv", calculator_rows(semesters)).decode("utf-8"))))
+    assert [row["semester_no"] for row in parsed] == ["1", "2"]
+
+
+def test_saved_semesters_with_the_same_label_stay_separate():
+    twins = [dict(SEMESTERS[0]), {**SEMESTERS[0], "id": 3, "gpa": 2.0}]
+    courses = {**COURSES, 3: [{"course_name": "CHM101", "course_code": "", "grade": "D", "units": 3, "grade_point": 2.0}]}
+    text = "".join(text_chunks("RECORDS", {}, record_rows(twins, courses)))
+    assert text.count("2023/2024 First Semester") == 2
+    assert text.index("GPA: 2.000") < text.index("CHM101")
+
+
+def test_pdf_last_line_breaks_onto_a_new_page():
+    pytest.importorskip("reportlab")
+    pages = lambda data: data.count(b"/Type /Page\n") + data.count(b"/Type /Page ")
+    full_page = "".join(f"line {n}\n" for n in range(58))
+    assert pages(transcript_export.pdf_bytes([full_page])) == 1
+    # One more line without a trailing newline must not be drawn below the bottom margin
+    assert pages(transcript_export.pdf_bytes([full_page + "last"])) == 2
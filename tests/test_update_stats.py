@@ -0,0 +1,113 @@
+import json
+from datetime import date
+
+import update_stats
+
+
+class CappedSession:
+    """Answers usage_logs GETs like PostgREST with max-rows set below the requested limit"""
+
+    def __init__(self, rows, max_rows):
+        self.rows = rows
+        self.max_rows = max_rows
+        self.requests = 0
+
+    def get(self, url, params, timeout):
+        self.requests += 1
+        op, _, value = params.get("id", "gt.0").partition(".")
+        if op == "in":
+            wanted = {int(log_id) for log_id in value.strip("()").split(",")}
+            page = [row for row in self.rows if row["id"] in wanted]
+        else:
+            page = [row for row in self.rows if row["id"] > int(value)]
+        return CappedResponse(page[:min(params.get("limit", self.max_rows), self.max_rows)])
+
+
+class CappedResponse:
+    def __init__(self, page):
+        self.page = page
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.page
+
+
+def log(log_id, action="visit", timestamp="2024-03-01T10:00:00Z"):
+    return {"id": log_id, "user_type": "guest", "action": action, "page": "landing", "timestamp": timestamp}
+
+
+def test_short_pages_do_not_end_the_scan():
+    session = CappedSession([log(i) for i in range(1, 8)], max_rows=3)
+    rows = list(update_stats.iter_usage_logs(session, page_size=5))
+    assert [row["id"] for row in rows] == list(range(1, 8))
+    assert session.requests == 4
+
+
+def test_scan_resumes_after_the_last_id():
+    session = CappedSession([log(i) for i in range(1, 8)], max_rows=10)
+    assert [row["id"] for row in update_stats.iter_usage_logs(session, after_id=5, page_size=5)] == [6, 7]
+
+
+def test_aggregator_counts_every_log():
+    aggregator = update_stats.UsageAggregator(update_stats.empty_state())
+    aggregator.add(log(1, "visit", "2024-03-01T23:30:00-02:00"))
+    aggregator.add(log(2, "calculate_gpa", "2024-03-02T08:00:00"))
+    aggregator.add({"id": 3, "timestamp": "not a date"})
+    assert aggregator.total == 3
+    assert aggregator.actions == {"visit": 1, "calculate_gpa": 1, "unknown": 1}
+    assert aggregator.user_types == {"guest": 2, "unknown": 1}
+    # Timestamps are bucketed by UTC day; unparseable ones don't move the high-water mark
+    assert aggregator.daily == {"2024-03-02": 2}
+    assert aggregator.last_id == 3
+    assert aggregator.last_timestamp == "2024-03-02T08:00:00+00:00"
+
+
+def test_aggregator_windows_and_daily_average():
+    aggregator = update_stats.UsageAggregator(update_stats.empty_state())
+    assert aggregator.average_daily() == 0
+    for log_id, day in enumerate(["2024-03-01", "2024-03-01", "2024-03-03", "2024-03-04"], 1):
+        aggregator.add(log(log_id, timestamp=f"{day}T12:00:00Z"))
+    today = date(2024, 3, 4)
+    assert aggregator.last_days(1, today) == 1
+    assert aggregator.last_days(2, today) == 2
+    assert aggregator.last_days(7, today) == 4
+    assert aggregator.average_daily() == 1
+
+
+def test_aggregator_state_round_trips():
+    aggregator = update_stats.UsageAggregator(update_stats.empty_state())
+    aggregator.add(log(1))
+    resumed = update_stats.UsageAggregator(json.loads(json.dumps(aggregator.to_state())))
+    resumed.add(log(2))
+    assert resumed.total == 2 and resumed.last_id == 2
+    assert resumed.to_state()["actions"] == {"visit": 2}
+    assert resumed.to_state()["daily"] == {"2024-03-01": 2}
+
+
+def test_late_commits_below_the_high_water_mark_are_counted_once():
+    aggregator = update_stats.UsageAggregator(update_stats.empty_state())
+    for log_id in (1, 2, 5):
+        aggregator.add(log(log_id))
+    assert aggregator.last_id == 5 and aggregator.gaps == {3, 4}
+    # Next run: id 4 has committed meanwhile, 3 hasn't, and 6 is new
+    session = CappedSession([log(i) for i in (1, 2, 4, 5, 6)], max_rows=1000)
+    state = json.loads(json.dumps(aggregator.to_state()))
+    resumed = update_stats.UsageAggregator(state)
+    late = sum(resumed.add(row) for row in update_stats.iter_usage_logs_by_id(session, resumed.gaps))
+    new = sum(resumed.add(row) for row in update_stats.iter_usage_logs(session, after_id=resumed.last_id))
+    assert (late, new) == (1, 1)
+    assert resumed.total == 5 and resumed.gaps == {3}
+    assert not resumed.add(log(4))
+    assert resumed.total == 5
+
+
+def test_gaps_outside_the_window_are_dropped():
+    aggregator = update_stats.UsageAggregator(update_stats.empty_state(), gap_window=3)
+    aggregator.add(log(1))
+    aggregator.add(log(10))
+    assert aggregator.gaps == {7, 8, 9}
+    aggregator.add(log(12))
+    aggregator.prune_gaps()
+    assert aggregator.gaps == {11}
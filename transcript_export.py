@@ -0,0 +1,190 @@
+"""
+Transcript export for the Streamlit app and the admin bulk export script.
+
+Course rows flow from one bulk fetch through generators into CSV, JSON Lines,
+plain text or PDF writers. Every writer yields text chunks as it goes, so long
+histories (or every user at once) never need to be held in memory as a whole.
+"""
+
+import csv
+import io
+import json
+
+EXPORT_COLUMNS = [
+    "semester_no", "academic_year", "semester", "semester_gpa", "semester_units",
+    "course_name", "course_code", "grade", "units", "grade_point",
+]
+# label, file extension, MIME type
+EXPORT_FORMATS = {
+    "txt": ("Text", "txt", "text/plain"),
+    "csv": ("CSV", "csv", "text/csv"),
+    "jsonl": ("JSON Lines", "jsonl", "application/x-ndjson"),
+    "pdf": ("PDF", "pdf", "application/pdf"),
+}
+FOOTER = [
+    "Generated by GPA/CGPA Calculator",
+    "Built by Mathematics Students, University of Lagos (2024)",
+    "Developers: Datapsalm & Victoria",
+    "Contact: datapsalm@gmail.com",
+]
+CHUNK_SIZE = 64 * 1024
+WIDTH = 60
+
+
+# ==================== ROW SOURCES ====================
+def record_rows(semesters, courses_by_semester, **extra):
+    """Rows for saved records: semester rows from the DB plus their courses grouped by semester id.
+    A semester without courses still gets one row, with the course columns set to None.
+    semester_no numbers the semesters from 1, since year and name needn't be unique.
+    Keyword arguments (e.g. user_id, username) are added to every row."""
+    for number, sem in enumerate(semesters, 1):
+        semester = {
+            **extra,
+            "semester_no": number,
+            "academic_year": sem['academic_year'],
+            "semester": sem['semester_name'],
+            "semester_gpa": round(float(sem['gpa']), 3),
+            "semester_units": sem['total_units'],
+        }
+        courses = courses_by_semester.get(sem['id'], [])
+        if not courses:
+            yield {**semester, "course_name": None, "course_code": None, "grade": None, "units": None, "grade_point": None}
+        for course in courses:
+            yield {
+                **semester,
+                "course_name": course['course_name'],
+                "course_code": course.get('course_code') or "",
+                "grade": course['grade'],
+                "units": course['units'],
+                "grade_point": course['grade_point'],
+            }
+
+
+def calculator_rows(semesters):
+    """Rows for unsaved calculator results: dicts with year, name, gpa, units and
+    courses (each with name, code, grade, unit, point)"""
+    for number, sem in enumerate(semesters, 1):
+        for course in sem['courses']:
+            yield {
+                "semester_no": number,
+                "academic_year": sem['year'],
+                "semester": sem['name'],
+                "semester_gpa": round(float(sem['gpa']), 3),
+                "semester_units": sem['units'],
+                "course_name": course['name'],
+                "course_code": course.get('code') or "",
+                "grade": course['grade'],
+                "units": course['unit'],
+                "grade_point": course['point'],
+            }
+
+
+# ==================== WRITERS ====================
+def csv_chunks(rows, columns=EXPORT_COLUMNS):
+    """CSV with a header row, flushed roughly every CHUNK_SIZE characters"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def jsonl_chunks(rows):
+    """One JSON object per row"""
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + "\n"
+
+
+def text_chunks(title, summary, rows):
+    """Readable report: title, summary lines, then one section per semester.
+    Rows must arrive grouped by semester, as both row sources produce them; sections are keyed on
+    semester_no because unsaved calculator semesters often share a year and name."""
+    yield f"{title}\n" + "=" * WIDTH + "\n\n"
+    yield "".join(f"{label}: {value}\n" for label, value in summary.items()) + "\n" + "=" * WIDTH + "\n\n"
+    current = None
+    for row in rows:
+        key = (row.get('username'), row['semester_no'])
+        if key != current:
+            if current is not None:
+                yield "\n"
+            current = key
+            owner = f"{row['username']}: " if row.get('username') else ""
+            yield (f"{owner}SEMESTER {row['semester_no']}: {row['academic_year']} {row['semester']}\n" + "-" * WIDTH + "\n"
+                   f"GPA: {row['semester_gpa']:.3f} | Units: {row['semester_units']}\n\n")
+        if row['course_name'] is None:
+            yield "  No courses saved\n\n"
+            continue
+        code = f" ({row['course_code']})" if row['course_code'] else ""
+        yield (f"  {row['course_name']}{code}\n"
+               f"  Grade: {row['grade']} | Units: {row['units']} | GP: {row['grade_point']}\n\n")
+    yield "\n" + "=" * WIDTH + "\n" + "\n".join(FOOTER) + "\n"
+
+
+def pdf_available():
+    """PDF export needs the optional reportlab package"""
+    try:
+        import reportlab  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def pdf_bytes(chunks):
+    """Lay out text chunks on A4 pages. PDF can't be emitted incrementally, but only
+    the current page's lines are held before being drawn."""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    output = io.BytesIO()
+    pdf = canvas.Canvas(output, pagesize=A4)
+    width, height = A4
+    margin, line_height = 50, 13
+    y = height - margin
+    pdf.setFont("Courier", 9)
+
+    def draw(line):
+        nonlocal y
+        if y < margin:
+            pdf.showPage()
+            pdf.setFont("Courier", 9)
+            y = height - margin
+        pdf.drawString(margin, y, line)
+        y -= line_height
+
+    pending = ""
+    for chunk in chunks:
+        *lines, pending = (pending + chunk).split("\n")
+        for line in lines:
+            draw(line)
+    if pending:
+        draw(pending)
+    pdf.save()
+    return output.getvalue()
+
+
+# ==================== PIPELINE ====================
+def export_chunks(fmt, rows, title="", summary=None):
+    """Text chunks for csv, jsonl or txt"""
+    if fmt == "csv":
+        return csv_chunks(rows)
+    if fmt == "jsonl":
+        return jsonl_chunks(rows)
+    if fmt == "txt":
+        return text_chunks(title, summary or {}, rows)
+    raise ValueError(f"Unknown export format: {fmt}")
+
+
+def export_bytes(fmt, rows, title="", summary=None):
+    """Whole export as bytes, for st.download_button"""
+    if fmt == "pdf":
+        return pdf_bytes(text_chunks(title, summary or {}, rows))
+    return "".join(export_chunks(fmt, rows, title, summary)).encode("utf-8")
+
+
+def available_formats():
+    return [fmt for fmt in EXPORT_FORMATS if fmt != "pdf" or pdf_available()]